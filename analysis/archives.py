@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""Streaming access to the files in .tar, .tar.gz, .tar.bz2, .tar.xz, .tar.zst and .zip archives.
+
+The published results (output.tar.gz, BENCHKIT.tar.gz) can be read by to_csv.py and
+benchkit_to_csv.py without extracting them: the members are decompressed one at a time in
+archive order and handed to the parsers as bytes. Reading .tar.zst archives requires the
+`zstandard` package.
+"""
+
+import os
+import tarfile
+import time
+import zipfile
+from typing import Callable, Iterator, Optional, Tuple
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz", ".tar.zst", ".tar.zstd")
+ZIP_SUFFIXES = (".zip",)
+
+
+def is_archive(path: str) -> bool:
+    return os.path.isfile(path) and path.endswith(TAR_SUFFIXES + ZIP_SUFFIXES)
+
+
+def _in_dir(name: str, member_dir: Optional[str]) -> bool:
+    if member_dir is None:
+        return True
+    return os.path.dirname(os.path.normpath(name)) == member_dir
+
+
+def _tar_stream(file, path):
+    if path.endswith((".zst", ".zstd")):
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(f"Reading {path} requires the zstandard package")
+        return tarfile.open(fileobj=zstandard.ZstdDecompressor().stream_reader(file), mode="r|")
+    return tarfile.open(fileobj=file, mode="r|*")
+
+
+def iter_members(path: str, member_dir: Optional[str] = None,
+                 read: Optional[Callable[[str], bool]] = None) -> Iterator[Tuple[str, int, int, Optional[bytes]]]:
+    """Yield (name, size, mtime_ns, contents) of the regular files in the archive, in archive order.
+
+    name is the file name. With member_dir (e.g. output/mcc2020/foo), only the files directly in that
+    folder of the archive are read; otherwise all files are read, and a RuntimeError is raised when
+    files of the same name are in different folders (e.g. the configurations of output.tar.gz), as
+    their results would be mixed up. If read is given, contents is None for the files whose name it
+    rejects, and these are skipped unread.
+    """
+    if member_dir is not None:
+        member_dir = os.path.normpath(member_dir)
+    folders = {}
+
+    def _name(name):
+        name = os.path.normpath(name)
+        folder, base = os.path.split(name)
+        if member_dir is None and folders.setdefault(base, folder) != folder:
+            raise RuntimeError(f"{path} contains {base} in both {folders[base] or '.'} and {folder or '.'}, "
+                               f"give the folder to read with --member-dir")
+        return base
+
+    if path.endswith(ZIP_SUFFIXES):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _in_dir(info.filename, member_dir):
+                    continue
+                name = _name(info.filename)
+                mtime = int(time.mktime(info.date_time + (0, 0, -1)) * 1e9)
+                yield name, info.file_size, mtime, archive.read(info) if read is None or read(name) else None
+        return
+
+    with open(path, "rb") as file, _tar_stream(file, path) as archive:
+        for member in archive:
+            if not member.isfile() or not _in_dir(member.name, member_dir):
+                continue
+            name = _name(member.name)
+            contents = archive.extractfile(member).read() if read is None or read(name) else None
+            yield name, member.size, int(member.mtime * 1e9), contents
@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+
+"""Translates the logs of MCC-mode runs (run_benchkit.sh) into per-query rows.
+
+Each log `BENCHKIT/<scripts>/<bin>/<model>.<examination>` contains the answers to all queries of
+the examination, produced by the steps of the portfolio in scripts/*/tapaal.sh. The logs are read
+line by line, tracking the current step (from the step banners), the strategy reported as
+`Solved by strategy <i> of <STRATEGIES_...>`, the @@@time,memory@@@ trailers and the remaining
+time printed by time_left. The formula names are written as the query names of the other CSVs,
+<model>-<NN>-<LTLC|LTLF>, also when they include the examination (<model>-LTLCardinality-<NN>).
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+from multiprocessing import Pool
+
+import archives
+
+_banner_re = re.compile(r"^\s*Step (-?\d+): (.*?)\s*$")
+_time_left_re = re.compile(r"^Time left:\s*(-?\d+)")
+_query_re = re.compile(r"^-+ QUERY (\d+) -+$")
+_strategy_re = re.compile(r"^Solved by strategy (\d*) of (\w+)")
+_formula_re = re.compile(r"FORMULA (\S+?)(?:-LTL(?:Fireability|Cardinality))?-(\d+) (\S+) TECHNIQUES")
+_trailer_re = re.compile(r"@@@([^,]*),([^@]*)@@@")
+
+# The strategies used by each step, for steps where the log does not say.
+STEP_STRATEGIES = {1: "STRATEGIES_PAR", 2: "STRATEGIES_SEQ", 3: "STRATEGY_MULTI", 4: "STRATEGIES_RAND"}
+
+
+def parse_log(lines, examination):
+    """Parse the lines of a log.
+
+    Returns a list of rows [query, answer, step, strategies, strategy, time, memory] (the last three
+    are empty if unknown; time and memory are only known for queries verified individually) and a list of [step, name, seconds] of the wall time spent in each step.
+    """
+    category = examination[:4]
+    rows = []
+    answered = set()
+    steps = []
+    step = ""
+    strategy = ""
+    strategies = ""
+    # Rows of the current QUERY block, which get the last trailer of the block when it ends.
+    block = None
+    trailer = ("", "")
+    time_left = None
+
+    def end_block():
+        for row in block or ():
+            row[5:7] = trailer
+
+    for line in lines:
+        line = line.rstrip("\n")
+        match = _time_left_re.match(line)
+        if match:
+            time_left = int(match.group(1))
+            continue
+        match = _banner_re.match(line)
+        if match:
+            end_block()
+            step = int(match.group(1))
+            steps.append([step, match.group(2), time_left])
+            strategy, strategies, block, trailer = "", "", None, ("", "")
+            continue
+        if _query_re.match(line):
+            end_block()
+            strategy, strategies, block, trailer = "", "", [], ("", "")
+            continue
+        match = _strategy_re.match(line)
+        if match:
+            strategy, strategies = match.groups()
+            continue
+        match = _trailer_re.search(line)
+        if match and block is not None:
+            trailer = match.groups()
+        match = _formula_re.search(line)
+        if match is None:
+            continue
+        model, index, answer = match.groups()
+        query = f"{model}-{index}-{category}"
+        if query not in answered:
+            # Step 2 prints the answer twice
+            answered.add(query)
+            rows.append([query, answer, step, strategies or STEP_STRATEGIES.get(step, ""), strategy, "", ""])
+            if block is not None:
+                block.append(rows[-1])
+    end_block()
+
+    # The time spent in a step is the difference between the time left at its start and at the start of the next step.
+    durations = []
+    for i, (step, name, start) in enumerate(steps):
+        end = steps[i + 1][2] if i + 1 < len(steps) else time_left
+        durations.append([step, name, start - end if start is not None and end is not None else ""])
+    return rows, durations
+
+
+def parse_log_file(job):
+    folder, log_file = job
+    model, _, examination = log_file.rpartition(".")
+    try:
+        with open(os.path.join(folder, log_file), errors="replace") as file:
+            rows, durations = parse_log(file, examination)
+    except IOError:
+        print(f"Unable to open {log_file}.", file=sys.stderr)
+        return [], []
+    return rows, [[model, examination, *duration] for duration in durations]
+
+
+def parse_log_member(job):
+    """Parse a log read from an archive."""
+    log_file, contents = job
+    model, _, examination = log_file.rpartition(".")
+    rows, durations = parse_log(contents.decode(errors="replace").splitlines(), examination)
+    return rows, [[model, examination, *duration] for duration in durations]
+
+
+def is_log_file(name):
+    return name.endswith(".LTLCardinality") or name.endswith(".LTLFireability")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("This utility translates the logs of a run_benchkit.sh output folder (BENCHKIT/<scripts>/<bin>) into a csv with a row per answer: query, answer, step, strategies, strategy index, time and memory.")
+    parser.add_argument("folder", help="Path to the folder containing the logs, or an archive (.tar, .tar.gz, .tar.zst, .zip) containing them.")
+    parser.add_argument("--member-dir", help="With an archive, the folder in the archive containing the logs, e.g. BENCHKIT/LTL/verifypn. Defaults to all files in the archive, which fails if files of the same name are in several folders.")
+    parser.add_argument("--steps", help="A file to write the wall time spent in each step of each log to, as model, examination, step, step name and seconds.")
+    parser.add_argument("-j", "--jobs", help="Number of worker processes used for parsing. Defaults to 1.", type=int, default=1)
+
+    args = parser.parse_args()
+
+    archive = archives.is_archive(args.folder)
+    if not archive and not os.path.isdir(args.folder):
+        print(f"{args.folder} is not a directory or an archive", file=sys.stderr)
+        exit(1)
+
+    if archive:
+        # The logs are decompressed by this process while the workers parse them, and output in archive order.
+        jobs = ((name, contents) for name, _, _, contents in archives.iter_members(args.folder, args.member_dir)
+                if is_log_file(name))
+        parse = parse_log_member
+    else:
+        with os.scandir(args.folder) as entries:
+            log_files = sorted(entry.name for entry in entries if entry.is_file() and is_log_file(entry.name))
+        jobs = ((args.folder, log_file) for log_file in log_files)
+        parse = parse_log_file
+    pool = Pool(args.jobs) if args.jobs > 1 else None
+    results = pool.imap(parse, jobs, chunksize=16) if pool is not None else map(parse, jobs)
+
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    steps_writer = None
+    if args.steps is not None:
+        steps_file = open(args.steps, "w")
+        steps_writer = csv.writer(steps_file, lineterminator="\n")
+    for rows, durations in results:
+        writer.writerows(rows)
+        if steps_writer is not None:
+            steps_writer.writerows(durations)
+
+    if pool is not None:
+        pool.close()
+        pool.join()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+"""Times the analysis pipeline on synthetic data at several scales (see synthesize.py).
+
+For each scale (the number of models relative to MCC2020) the CSVs of a few configurations and
+an oracle of the scaled queries are synthesized, and every stage is run as a separate process
+measuring its wall time and maximum RSS:
+
+- to_csv: to_csv.py on a synthesized output folder (only up to --tree-scale, as the folders
+  are large),
+- import_csv: common.import_csv of the CSVs,
+- trivial: trivial-answers.py, writing the exclude file used by the later stages,
+- stats: stats-generator.py --batch,
+- table: make-table.py,
+- cactus: cactus_plots.py.
+
+The synthesized data is kept in the work folder and only regenerated when its parameters change.
+Each run is appended as a JSON line to the results file, labelled by the current commit unless
+given a label, so that a run can be compared to an earlier one.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from multiprocessing import Process
+
+import synthesize
+
+ANALYSIS = os.path.dirname(os.path.abspath(__file__))
+STAGES = ["to_csv", "import_csv", "trivial", "stats", "table", "cactus"]
+
+
+def _script(name, *args):
+    return [sys.executable, os.path.join(ANALYSIS, name), *args]
+
+
+def stage_command(stage, folder, csvs, jobs):
+    """The command of a stage as (argv, stdout path or None), or None if there is no output folder for to_csv."""
+    names = [os.path.splitext(os.path.basename(path))[0] for path in csvs]
+    if stage == "to_csv":
+        if not os.path.isdir(os.path.join(folder, "output")):
+            return None
+        return _script("to_csv.py", "-j", str(jobs), os.path.join("output", names[0])), None
+    if stage == "import_csv":
+        code = f"import sys; sys.path.insert(0, {ANALYSIS!r}); import common\n" \
+               f"for path in {csvs!r}:\n    common.load_input(path)"
+        return [sys.executable, "-c", code], None
+    if stage == "trivial":
+        return _script("trivial-answers.py", *csvs), "exclude"
+    if stage == "stats":
+        return _script("stats-generator.py", "-b", *csvs, "-n", *names, "-o", "oracle", "-j", str(jobs)), None
+    if stage == "table":
+        return _script("make-table.py", "-i", *csvs, "-n", *names, "-o", "table.tex"), None
+    if stage == "cactus":
+        return _script("cactus_plots.py", "--inputs", *csvs, "--names", *names, "-o", "cactus", "-f", "png",
+                       "-p", "time", "memory", "-j", str(jobs)), None
+    raise ValueError(f"Unknown stage {stage}")
+
+
+def measure(argv, stdout, cwd):
+    """Run the command. Returns (exit status, wall seconds, maximum RSS in KiB)."""
+    with open(os.path.join(cwd, stdout) if stdout else os.devnull, "w") as out:
+        start = time.monotonic()
+        process = subprocess.Popen(argv, cwd=cwd, stdout=out, stderr=subprocess.DEVNULL)
+        _, status, rusage = os.wait4(process.pid, 0)
+        elapsed = time.monotonic() - start
+    code = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    return code, elapsed, rusage.ru_maxrss
+
+
+def _synthesize(folder, scale, configurations, oracle, params, seed, tree):
+    queries = synthesize.scale_queries(synthesize.oracle_queries(oracle), scale)
+    with open(os.path.join(folder, "oracle"), "w") as file:
+        for name, answer in queries:
+            print(f"{name}, {answer}", file=file)
+    for i, name in enumerate(configurations):
+        output = None
+        if tree and i == 0:
+            output = os.path.join(folder, "output", name)
+            os.makedirs(output)
+        with open(os.path.join(folder, f"{name}.csv"), "w") as file:
+            synthesize.synthesize(queries, name, seed, params, output, file)
+
+
+def prepare(folder, scale, configurations, oracle, params, seed, tree):
+    """Synthesize the data of a scale in folder unless it is already there. Returns the CSV paths relative to folder."""
+    stamp = {"scale": scale, "configurations": configurations, "oracle": os.path.abspath(oracle),
+             "parameters": params._asdict(), "seed": seed, "tree": tree}
+    csvs = [f"{name}.csv" for name in configurations]
+    try:
+        with open(os.path.join(folder, "parameters.json")) as file:
+            if json.load(file) == stamp:
+                return csvs
+    except FileNotFoundError:
+        pass
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    print(f"Synthesizing the data of scale {scale:g}", file=sys.stderr)
+    # Synthesized in a child process, as the stages would otherwise inherit the memory of the queries in their maximum RSS.
+    process = Process(target=_synthesize, args=(folder, scale, configurations, oracle, params, seed, tree))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Synthesizing the data of scale {scale:g} failed")
+    with open(os.path.join(folder, "parameters.json"), "w") as file:
+        json.dump(stamp, file)
+    return csvs
+
+
+def run(work, scales, stages, configurations, oracle, params, seed, tree_scale, repeat, jobs):
+    results = []
+    for scale in scales:
+        folder = os.path.join(work, f"scale-{scale:g}")
+        csvs = prepare(folder, scale, configurations, oracle, params, seed, scale <= tree_scale)
+        for stage in stages:
+            command = stage_command(stage, folder, csvs, jobs)
+            if command is None:
+                continue
+            best, maxrss, status = None, 0, 0
+            for _ in range(repeat):
+                code, seconds, rss = measure(*command, folder)
+                status = status or code
+                maxrss = max(maxrss, rss)
+                best = seconds if best is None else min(best, seconds)
+            result = {"stage": stage, "scale": scale, "seconds": round(best, 3), "maxrss": maxrss, "status": status}
+            print(f"{stage:>10} {scale:>6g}x {best:10.2f} s {maxrss / 1024:10.1f} MiB" + (f"  (exit status {status})" if status else ""))
+            results.append(result)
+    return results
+
+
+def load_runs(path):
+    try:
+        with open(path) as file:
+            return [json.loads(line) for line in file if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def compare(old, new, tolerance):
+    """Print the change of each stage from the old to the new run. Returns whether no stage got slower by more than tolerance percent."""
+    previous = {(r["stage"], r["scale"]): r for r in old["results"]}
+    ok = True
+    print(f"Compared to {old['label']} ({old['date']}):")
+    for result in new["results"]:
+        before = previous.get((result["stage"], result["scale"]))
+        if before is None or before["status"] or result["status"]:
+            continue
+        time_change = 100 * (result["seconds"] / max(before["seconds"], 1e-3) - 1)
+        memory_change = 100 * (result["maxrss"] / max(before["maxrss"], 1) - 1)
+        regression = time_change > tolerance
+        ok = ok and not regression
+        print(f"{result['stage']:>10} {result['scale']:>6g}x {time_change:+8.1f}% time {memory_change:+8.1f}% memory"
+              + ("  REGRESSION" if regression else ""))
+    return ok
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ANALYSIS, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="This utility times the stages of the analysis on synthetic data at several scales and stores the results for comparison.")
+    parser.add_argument("-s", "--scales", nargs="+", type=float, default=[1, 10, 100], help="Numbers of models relative to MCC2020. Defaults to 1 10 100.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="The stages to run. Defaults to all.")
+    parser.add_argument("-w", "--work-dir", default="benchmark-data", help="Folder of the synthesized data. Defaults to benchmark-data.")
+    parser.add_argument("--tree-scale", type=float, default=1, help="Largest scale at which an output folder is synthesized for the to_csv stage. Defaults to 1 (about 700 MiB).")
+    parser.add_argument("-n", "--configurations", type=int, default=4, help="Number of synthesized configurations. Defaults to 4.")
+    parser.add_argument("--oracle", default="single-oracle", help="The oracle whose queries are synthesized. Defaults to single-oracle.")
+    parser.add_argument("--seed", default="0", help="Seed of the synthesized data. Defaults to 0.")
+    parser.add_argument("--log-lines", type=int, default=synthesize.DEFAULT_PARAMETERS.log_lines, help=f"Median number of verbose log lines per output file. Defaults to {synthesize.DEFAULT_PARAMETERS.log_lines}.")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="Run each stage this many times and keep the fastest. Defaults to 1.")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of worker processes given to the stages. Defaults to the number of CPUs.")
+    parser.add_argument("-o", "--results", default="benchmarks.jsonl", help="File the run is appended to. Defaults to benchmarks.jsonl.")
+    parser.add_argument("-l", "--label", help="Label of the run. Defaults to the current commit.")
+    parser.add_argument("-c", "--compare", help="Compare the run with the last stored run with this label. Exits with status 1 on a regression.")
+    parser.add_argument("-t", "--tolerance", type=float, default=10, help="Percentage by which a stage may get slower before it counts as a regression. Defaults to 10.")
+
+    args = parser.parse_args()
+
+    runs = load_runs(args.results)
+    baseline = None
+    if args.compare is not None:
+        baseline = next((r for r in reversed(runs) if r["label"] == args.compare), None)
+        if baseline is None:
+            print(f"No run labelled {args.compare} in {args.results}")
+            sys.exit(1)
+
+    params = synthesize.DEFAULT_PARAMETERS._replace(log_lines=args.log_lines)
+    configurations = [f"conf{i + 1}" for i in range(args.configurations)]
+    results = run(args.work_dir, args.scales, args.stages, configurations, args.oracle, params, args.seed,
+                  args.tree_scale, args.repeat, args.jobs)
+
+    record = {"label": args.label or current_commit(), "date": datetime.datetime.now().isoformat(timespec="seconds"),
+              "python": sys.version.split()[0], "jobs": args.jobs, "results": results}
+    with open(args.results, "a") as file:
+        print(json.dumps(record), file=file)
+
+    if baseline is not None and not compare(baseline, record, args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""Builds an oracle file (like single-oracle) from the oracles of a model repository.
+
+The oracle files of e.g. https://github.com/yanntm/pnmcc-models-2020 (*-LTLF.out and *-LTLC.out,
+or *-LTLFireability.out and *-LTLCardinality.out) are read in parallel, and their
+`FORMULA <model>-<n> TRUE|FALSE TECHNIQUES ...` lines are written as `<model>-<n>-<LTLF|LTLC>, <answer>`,
+the query names of the CSVs. Formula names that include the examination
+(`<model>-LTLFireability-<n>`) are normalized the same way. The oracle is sorted by query name,
+so its index (see oracle.py) can be written directly. Queries with conflicting answers are
+reported and left out.
+"""
+
+import argparse
+import os
+import re
+import sys
+from array import array
+from collections import defaultdict
+from multiprocessing import Pool
+
+import oracle
+
+SUFFIXES = {"LTLF.out": "LTLF", "LTLC.out": "LTLC", "LTLFireability.out": "LTLF", "LTLCardinality.out": "LTLC"}
+
+_formula_re = re.compile(rb"^FORMULA (\S+?)(?:-LTL(?:Fireability|Cardinality))?-(\d+) (TRUE|FALSE) TECHNIQUES", re.MULTILINE)
+
+
+def category(name):
+    return next((c for suffix, c in SUFFIXES.items() if name.endswith(suffix)), None)
+
+
+def find_oracle_files(folder):
+    """The (path, category) of the oracle files in the folder and its subfolders, sorted by path."""
+    files = []
+    for root, _, names in os.walk(folder):
+        for name in names:
+            c = category(name)
+            if c is not None:
+                files.append((os.path.join(root, name), c))
+    return sorted(files)
+
+
+def read_answers(job):
+    """The (query, answer) pairs of an oracle file."""
+    path, c = job
+    with open(path, "rb") as file:
+        contents = file.read()
+    return path, [(f"{model.decode()}-{index.decode()}-{c}", answer.decode())
+                  for model, index, answer in _formula_re.findall(contents)]
+
+
+def collect(results):
+    """Merge the answers of the files. Returns the answers and the conflicting queries with the answer of each file."""
+    answers = {}
+    sources = defaultdict(list)
+    conflicts = set()
+    for path, pairs in results:
+        for query, answer in pairs:
+            sources[query].append((path, answer))
+            if answers.setdefault(query, answer) != answer:
+                conflicts.add(query)
+    for query in conflicts:
+        del answers[query]
+    return answers, {query: sources[query] for query in sorted(conflicts)}
+
+
+def write_oracle(path, answers, index):
+    """Write the answers sorted by query name, and their index if requested."""
+    offsets = []
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as file:
+        for query in sorted(answers, key=str.encode):
+            offsets.append(file.tell())
+            file.write(f"{query}, {answers[query]}\n".encode())
+    os.replace(tmp, path)
+    if index:
+        stat = os.stat(path)
+        oracle.write_index(path + oracle.INDEX_SUFFIX, array("I" if stat.st_size < 2 ** 32 else "Q", offsets), stat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="This utility builds a single sorted oracle file from the LTLFireability and LTLCardinality oracles of a model repository.")
+    parser.add_argument("folder", help="The folder containing the oracle files, e.g. pnmcc-models-2020/oracle. Subfolders are searched too.")
+    parser.add_argument("-o", "--output", default="single-oracle-new", help="The oracle file to write. Defaults to single-oracle-new.")
+    parser.add_argument("-i", "--index", action="store_true", help="Also write the index of the oracle (<output>.idx), which is otherwise written when the oracle is first used.")
+    parser.add_argument("-c", "--conflicts", help="Write the conflicting answers to this file as lines of query, answer and oracle file.")
+    parser.add_argument("-j", "--jobs", type=int, help="Number of worker processes reading the oracle files. Defaults to the number of CPUs.")
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        print(f"{args.folder} is not a folder")
+        sys.exit(1)
+
+    files = find_oracle_files(args.folder)
+    if not files:
+        print(f"No oracle files found in {args.folder}")
+        sys.exit(1)
+
+    with Pool(args.jobs) as pool:
+        answers, conflicts = collect(pool.imap(read_answers, files, chunksize=64))
+    write_oracle(args.output, answers, args.index)
+    print(f"Wrote {len(answers)} answers from {len(files)} files to {args.output}", file=sys.stderr)
+
+    if conflicts:
+        print(f"Left out {len(conflicts)} queries with conflicting answers", file=sys.stderr)
+        if args.conflicts is not None:
+            with open(args.conflicts, "w") as file:
+                for query, sources in conflicts.items():
+                    for path, answer in sources:
+                        print(f"{query}, {answer}, {path}", file=file)
+        sys.exit(2)
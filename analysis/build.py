@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+"""Rebuilds the CSVs, exclude file, tables, plots and statistics of the analysis that are out of date.
+
+The artifacts are described by a JSON file (see the README), e.g.
+
+    {
+      "configurations": {"baseline": "output/mcc2020/baseline", "dist-heur": "output/mcc2020/dist-heur"},
+      "exclude": true,
+      "tables": [{"output": "tables/num-answered.tex"}],
+      "plots": [{"output": "plots/cactus-all", "args": ["--virtual-best", "--no-simplification", "-m", "1"]}],
+      "stats": {"output": "stats.json"}
+    }
+
+From it a graph of nodes is built: a CSV per configuration (to_csv.py), the exclude file
+(trivial-answers.py), and a node per table (make-table.py), plot (cactus_plots.py) and the
+statistics (stats-generator.py). A node is rebuilt when the hash of its command and inputs differs
+from its last build or an output is missing. Files are hashed by content; output folders by the
+names, sizes and modification times of their files. Since the hash of a CSV is taken after it is
+built, rebuilding a configuration whose rows did not change rebuilds nothing else. Independent
+nodes are run concurrently. Paths are relative to the folder of the JSON file, which is also the
+working directory of the scripts.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+ANALYSIS = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = ".build-state.json"
+
+
+class Node:
+    """A command producing outputs from inputs. Inputs produced by other nodes make these its dependencies."""
+
+    def __init__(self, name: str, script: str, args: List[str], inputs: List[str], outputs: List[str],
+                 stdout: Optional[str] = None):
+        self.name = name
+        self.command = [sys.executable, os.path.join(ANALYSIS, script), *args]
+        self.inputs = inputs
+        self.outputs = outputs
+        self.stdout = stdout
+
+
+def hash_path(path: str) -> str:
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        with os.scandir(path) as entries:
+            for entry in sorted((e for e in entries if e.is_file()), key=lambda e: e.name):
+                stat = entry.stat()
+                digest.update(f"{entry.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    elif os.path.isfile(path):
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    else:
+        return "missing"
+    return digest.hexdigest()
+
+
+def _configuration(value):
+    """The folder, member_dir and extra arguments of a configuration given as a path or an object."""
+    if isinstance(value, str):
+        return value, None, []
+    return value["folder"], value.get("member_dir"), value.get("args", [])
+
+
+def make_graph(config: dict) -> Dict[str, Node]:
+    nodes = {}
+    csv_dir = config.get("csv_dir", "csv")
+    csvs = {}
+    for name, value in config["configurations"].items():
+        folder, member_dir, args = _configuration(value)
+        csvs[name] = os.path.join(csv_dir, f"{name}.csv")
+        nodes[f"csv:{name}"] = Node(f"csv:{name}", "to_csv.py",
+                                    [*(["--member-dir", member_dir] if member_dir else []),
+                                     "-j", str(config.get("csv_jobs", 1)), *args, folder],
+                                    [folder], [csvs[name]], stdout=csvs[name])
+
+    def _inputs(entry):
+        names = entry.get("configurations", list(csvs))
+        return names, [csvs[name] for name in names], entry.get("names", names)
+
+    if config.get("exclude"):
+        names = config["exclude"] if isinstance(config["exclude"], list) else list(csvs)
+        nodes["exclude"] = Node("exclude", "trivial-answers.py", [csvs[name] for name in names],
+                                [csvs[name] for name in names], ["exclude"], stdout="exclude")
+
+    for table in config.get("tables", []):
+        _, inputs, labels = _inputs(table)
+        args = table.get("args", [])
+        uses_exclude = "-q" not in args and "--query-simplification" not in args
+        nodes[f"table:{table['output']}"] = Node(
+            f"table:{table['output']}", table.get("script", "make-table.py"),
+            ["-i", *inputs, "-n", *labels, "-o", table["output"], *args],
+            inputs + (["exclude"] if uses_exclude else []), [table["output"]])
+
+    for plot in config.get("plots", []):
+        _, inputs, labels = _inputs(plot)
+        args = plot.get("args", [])
+        kinds = plot.get("plots", ["time"])
+        fmt = plot.get("format", "pdf")
+        extra = ["simplified", "immediate-solve"] if "--no-simplification" in args else []
+        if "spec" in plot:
+            # The outputs of the views of a spec are not known here, so they must be listed.
+            args = ["-s", plot["spec"], *args]
+            extra.append(plot["spec"])
+        nodes[f"plot:{plot['output']}"] = Node(
+            f"plot:{plot['output']}", "cactus_plots.py",
+            ["--inputs", *inputs, "--names", *labels, "-o", plot["output"], "-f", fmt, "-p", *kinds, "-j", "1", *args],
+            inputs + extra, plot.get("outputs", [f"{plot['output']}-{kind}.{fmt}" for kind in kinds]))
+
+    if config.get("stats"):
+        stats = config["stats"]
+        _, inputs, labels = _inputs(stats)
+        args = stats.get("args", [])
+        oracles = stats.get("oracle", ["single-oracle"])
+        extra = ["simplified", "immediate-solve"] if "--no-query" in args else []
+        nodes["stats"] = Node("stats", "stats-generator.py",
+                              ["-b", *inputs, "-n", *labels, "-o", *oracles, "-r", stats["output"], *args],
+                              inputs + oracles + extra, [stats["output"]], stdout=f"{stats['output']}.txt")
+    return nodes
+
+
+def dependencies(nodes: Dict[str, Node]) -> Dict[str, set]:
+    producers = {output: name for name, node in nodes.items() for output in node.outputs}
+    return {name: {producers[i] for i in node.inputs if i in producers and producers[i] != name}
+            for name, node in nodes.items()}
+
+
+def node_hash(node: Node, hashes: Dict[str, str]) -> str:
+    digest = hashlib.sha256(json.dumps(node.command[1:]).encode())
+    for path in node.inputs:
+        if path not in hashes:
+            hashes[path] = hash_path(path)
+        digest.update(f"{path}\0{hashes[path]}\n".encode())
+    return digest.hexdigest()
+
+
+def run_node(node: Node) -> int:
+    for output in node.outputs:
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+    if node.stdout is None:
+        return subprocess.run(node.command).returncode
+    # Written next to the output and moved into place, so a failed build leaves no partial output.
+    tmp = f"{node.stdout}.tmp"
+    with open(tmp, "w") as file:
+        code = subprocess.run(node.command, stdout=file).returncode
+    if code == 0:
+        os.replace(tmp, node.stdout)
+    else:
+        os.remove(tmp)
+    return code
+
+
+def load_state() -> dict:
+    try:
+        with open(STATE_FILE) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(state: dict):
+    with open(f"{STATE_FILE}.tmp", "w") as file:
+        json.dump(state, file, indent=1, sort_keys=True)
+    os.replace(f"{STATE_FILE}.tmp", STATE_FILE)
+
+
+def build(nodes: Dict[str, Node], targets: Optional[List[str]] = None, jobs: Optional[int] = None,
+          force=False, dry_run=False) -> bool:
+    """Rebuild the out of date targets (by default all nodes) and their dependencies. Returns whether all succeeded."""
+    deps = dependencies(nodes)
+    wanted = set()
+    pending = list(targets or nodes)
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(deps[name])
+
+    state = load_state()
+    hashes = {}
+    done, failed = set(), set()
+    # Dry runs do not rebuild the outputs, so the dependents of a node that would be built are stale without hashing them.
+    would_build = set()
+    remaining = {name: deps[name] & wanted for name in wanted}
+    running = {}
+    ok = True
+
+    def _ready():
+        return [name for name, waiting in remaining.items() if not waiting - done]
+
+    with ThreadPoolExecutor(jobs or os.cpu_count()) as pool:
+        while remaining or running:
+            for name in _ready():
+                del remaining[name]
+                node = nodes[name]
+                if deps[name] & failed:
+                    print(f"Skipping {name}: a dependency failed", file=sys.stderr)
+                    failed.add(name)
+                    continue
+                digest = None
+                if not deps[name] & would_build:
+                    digest = node_hash(node, hashes)
+                    if not force and state.get(name) == digest and all(os.path.exists(o) for o in node.outputs):
+                        done.add(name)
+                        continue
+                print(f"Building {name}", file=sys.stderr)
+                if dry_run:
+                    would_build.add(name)
+                    done.add(name)
+                    continue
+                running[pool.submit(run_node, node)] = (name, digest)
+            if not running:
+                if remaining and not _ready():
+                    raise RuntimeError(f"Dependency cycle among {', '.join(sorted(remaining))}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, digest = running.pop(future)
+                if future.result() != 0:
+                    print(f"Failed to build {name}", file=sys.stderr)
+                    failed.add(name)
+                    ok = False
+                    continue
+                # The outputs are rehashed when used, so unchanged outputs do not make the dependents stale.
+                for output in nodes[name].outputs:
+                    hashes.pop(output, None)
+                state[name] = digest
+                save_state(state)
+                done.add(name)
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="This utility rebuilds the out of date CSVs, exclude file, tables, plots and statistics described by a JSON file.")
+    parser.add_argument("config", help="The JSON file describing the configurations and artifacts.")
+    parser.add_argument("targets", nargs="*", help="Nodes to build with their dependencies, e.g. csv:baseline or plot:plots/cactus-all. Defaults to all.")
+    parser.add_argument("-j", "--jobs", type=int, help="Number of nodes built concurrently. Defaults to the number of CPUs.")
+    parser.add_argument("-B", "--force", action="store_true", help="Rebuild the nodes even if they are up to date.")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Only print the nodes that would be built.")
+    parser.add_argument("-l", "--list", action="store_true", help="List the nodes and their commands.")
+
+    args = parser.parse_intermixed_args()
+
+    with open(args.config) as file:
+        config = json.load(file)
+    os.chdir(os.path.dirname(os.path.abspath(args.config)))
+    nodes = make_graph(config)
+
+    if args.list:
+        for name, node in nodes.items():
+            print(f"{name}: {' '.join(node.command[1:])}" + (f" > {node.stdout}" if node.stdout else ""))
+        sys.exit(0)
+
+    for target in args.targets:
+        if target not in nodes:
+            print(f"Unknown node {target}", file=sys.stderr)
+            sys.exit(1)
+
+    if not build(nodes, args.targets, args.jobs, args.force, args.dry_run):
+        sys.exit(1)
@@ -1,15 +1,51 @@
 #!/usr/bin/python3
 
 import argparse
-import csv
+import json
 import os
 import sys
-from functools import reduce
-from typing import Dict, Set, Tuple, Optional
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-plt.rc('text', usetex=True)
-plt.rc('font', family='serif')
+from multiprocessing import Pool
+from typing import Dict
+
+import numpy as np
+
+from common import Dataset, load_input
+from matrix import ResultMatrix, VIRTUAL_BEST
+from queries import SIMPLIFICATION_SETS, query_set
+
+# Imported by setup_matplotlib, so that e.g. -h does not pay for importing matplotlib.
+plt = None
+ticker = None
+
+# The resolution of the saved figures and of the previews.
+DPI = 1000
+PREVIEW_DPI = 100
+# The number of points each series is decimated to in previews.
+PREVIEW_POINTS = 1000
+
+
+def setup_matplotlib(preview=False):
+    """Import matplotlib. Previews are rendered by the Agg backend without TeX."""
+    global plt, ticker
+    if plt is not None:
+        return
+    import matplotlib
+    if preview:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot
+    import matplotlib.ticker
+    plt = matplotlib.pyplot
+    ticker = matplotlib.ticker
+    plt.rc('text', usetex=not preview)
+    plt.rc('font', family='serif')
+
+
+def decimate(x, y, max_points):
+    """At most max_points of the points of a series, always including its first and last point."""
+    if max_points is None or len(y) <= max_points:
+        return x, y
+    keep = np.unique(np.linspace(0, len(y) - 1, max_points).round().astype(int))
+    return np.asarray(x)[keep], y[keep]
 
 
 def format_logdecimal(value, pos=None):
@@ -18,6 +54,151 @@ def format_logdecimal(value, pos=None):
     else:
         return '$%d$' % value
 
+LINESTYLES = ['-', '--', '-.', ':', (0, (3,1,1,1)), (0, (5, 1)), (0, (3, 3,1,3,1,3))]
+COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+VBS_LINESTYLE = (0, (5, 2, 1, 2, 1, 2))
+VBS_COLOR = '#000000'
+
+
+def line_style(results, i, args):
+    """The line style and color of configuration i."""
+    linestyles = LINESTYLES[1:] if args.less_styles else LINESTYLES
+    colors = COLORS[1:] if args.less_styles else COLORS
+    if results.names[i] == VIRTUAL_BEST:
+        return VBS_LINESTYLE, VBS_COLOR
+    return linestyles[i], colors[i]
+
+
+def plot_time(results, args):
+    fig, ax = plt.subplots()
+    plt.yscale('log')
+    #ax.yaxis.set_major_formatter(ticker.FuncFormatter(format_logdecimal))
+    #ax.yaxis.set_minor_formatter(ticker.FuncFormatter(format_logdecimal))
+    formatter = ticker.LogFormatter(minor_thresholds=(2, 1))
+    ax.yaxis.set_major_formatter(formatter)
+    ax.yaxis.set_minor_formatter(formatter)
+    x_maxes = []
+    time_series = {}
+    for i, name in enumerate(results.names):
+        time = results.series(i, "time")
+        if args.limit is not None:
+            time = time[time < args.limit]
+        if args.min is not None:
+            time = time[time >= args.min]
+        time_series[name] = time
+        x_maxes.append(len(time))
+
+    cut = None
+    if args.tail:
+        if VIRTUAL_BEST in results.names:
+            cut = max(x_maxes[:-1]) - args.tail
+        else:
+            cut = max(x_maxes) - args.tail
+
+    for i, (name, time) in enumerate(time_series.items()):
+        n_below = results.count(i) - len(time)
+        x = np.arange(n_below, n_below + len(time))
+        if cut is not None and args.max_points is not None:
+            # Only the tail is shown, so the points are spent there.
+            first = max(0, np.searchsorted(x, cut) - 1)
+            x, time = x[first:], time[first:]
+        x, time = decimate(x, time, args.max_points)
+
+        linestyle, color = line_style(results, i, args)
+        path = plt.plot(x, time, linestyle=linestyle, color=color, label=f"{name} ($n={results.count(i)}$)")
+        # c=path.get_facecolors()[0].tolist()
+        if args.max_line:
+            plt.axvline(x_maxes[i], c='k', linestyle='--')
+
+    if cut is not None:
+        plt.xlim(left=cut, right=max(x_maxes) + 5)
+        ybot = 0.8 * min(T[cut] for T in time_series.values())
+        ytop = 1.2 * max(T[-1] for T in time_series.values())
+        plt.ylim(ybot, ytop)
+
+
+    if not args.no_legend:
+        plt.legend()
+    plt.title("Time (in seconds)")
+    if args.limit is not None:
+        plt.ylim(top=args.limit)
+    if args.min is not None:
+        plt.ylim(bottom=args.min)
+
+    plt.savefig(f"{args.output_file}-time.{args.format}", format=args.format, bbox_inches="tight", dpi=args.dpi)
+    plt.close(fig)
+
+
+def plot_memory(results, args):
+    fig, ax = plt.subplots()
+    plt.yscale('log')
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(format_logdecimal))
+    for i, name in enumerate(results.names):
+        memory = results.series(i, "memory") / 1024
+        linestyle, color = line_style(results, i, args)
+        plt.plot(*decimate(range(len(memory)), memory, args.max_points), linestyle=linestyle, color=color, label=f"{name} ($n={results.count(i)}$)")
+
+    if not args.no_legend:
+        plt.legend()
+    plt.title("Memory (in MB)")
+    #if args.limit is not None:
+    #    plt.ylim(0, args.limit)
+    plt.savefig(f"{args.output_file}-memory.{args.format}", format=args.format, bbox_inches="tight", dpi=args.dpi)
+    plt.close(fig)
+
+
+def plot_explored(results, args):
+    fig, ax = plt.subplots()
+    plt.yscale('log')
+    ax.yaxis.set_major_formatter(ticker.LogFormatter())
+    for i, name in enumerate(results.names):
+        explored = results.series(i, "states")
+        linestyle, color = line_style(results, i, args)
+        plt.plot(*decimate(range(len(explored)), explored, args.max_points), linestyle=linestyle, color=color, label=f"{name} ($n={results.count(i)}$)")
+
+    if not args.no_legend:
+        plt.legend()
+    plt.title("Explored states")
+    #if args.limit is not None:
+    #    plt.ylim(0, args.limit)
+    plt.savefig(f"{args.output_file}-explored.{args.format}", format=args.format, bbox_inches="tight", dpi=args.dpi)
+    plt.close(fig)
+
+
+PLOTS = {"time": plot_time, "memory": plot_memory, "explored": plot_explored}
+
+# The view options that can be set in a --spec file.
+VIEW_OPTIONS = {"output_file", "format", "limit", "min", "tail", "max_line", "no_legend", "less_styles", "plots",
+                "dpi", "max_points"}
+
+
+def make_view(args, entry):
+    """The options of a view given as a dict in a spec file, with the command line options as defaults."""
+    view = argparse.Namespace(**{option: getattr(args, option) for option in VIEW_OPTIONS})
+    for key, value in entry.items():
+        key = key.replace("-", "_")
+        if key not in VIEW_OPTIONS:
+            raise RuntimeError(f"Unknown view option {key}, must be one of {', '.join(sorted(VIEW_OPTIONS))}")
+        setattr(view, key, value)
+    for plot in view.plots:
+        if plot not in PLOTS:
+            raise RuntimeError(f"Unknown plot {plot}, must be one of {', '.join(PLOTS)}")
+    return view
+
+
+_results = None
+
+def _init_worker(results, preview):
+    global _results
+    _results = results
+    setup_matplotlib(preview)
+
+
+def render(task):
+    view, plot = task
+    PLOTS[plot](_results, view)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="This utility takes csv files and creates time and memory cactus plots for them."
@@ -25,8 +206,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "-f",
         "--format",
-        help="The format of the saved figures. Must be a matplotlib supported format. Defaults to pdf",
-        default="pdf",
+        help="The format of the saved figures. Must be a matplotlib supported format. Defaults to pdf, or png with --preview",
     )
     parser.add_argument(
         "-l", "--limit", help="Limit the y-axis on the plots.", type=int
@@ -49,7 +229,7 @@ if __name__ == "__main__":
         help="Only display queries in the intersection of all inputs.",
         action="store_true",
     )
-    parser.add_argument("--inputs", nargs="+", help="list of input files")
+    parser.add_argument("--inputs", nargs="+", help="list of input files, or <database>:<configuration> for results in a results database")
     parser.add_argument("--names", nargs="*", help="list of labels of the inputs")
     parser.add_argument(
         "--max_line",
@@ -90,6 +270,42 @@ if __name__ == "__main__":
         action="store_true",
     )
     parser.add_argument("--less-styles", action="store_true")
+    parser.add_argument(
+        "-p",
+        "--plots",
+        nargs="+",
+        choices=list(PLOTS),
+        default=["time"],
+        help="The plots to generate. Defaults to only the time plot.",
+    )
+    parser.add_argument(
+        "-s",
+        "--spec",
+        type=argparse.FileType("r"),
+        help="JSON file containing a list of views to render from the same inputs. Each view is an object with any of the options "
+        + ", ".join(sorted(VIEW_OPTIONS)) + " (e.g. {\"output_file\": \"cactus-tail\", \"tail\": 1500}), defaulting to the command line options.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help=f"Render quick previews: without TeX, at {PREVIEW_DPI} DPI, as png and with the series decimated to {PREVIEW_POINTS} points.",
+    )
+    parser.add_argument(
+        "--dpi",
+        type=int,
+        help=f"The resolution of the saved figures. Defaults to {DPI}, or {PREVIEW_DPI} with --preview.",
+    )
+    parser.add_argument(
+        "--max-points",
+        type=int,
+        help=f"Decimate each series to at most this many points (0 to plot all points). Defaults to all points, or {PREVIEW_POINTS} with --preview.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of worker processes used for rendering the plots. Defaults to the number of CPUs.",
+    )
 
     args = parser.parse_args()
 
@@ -98,57 +314,23 @@ if __name__ == "__main__":
         print(args.inputs)
         raise RuntimeError("Please provide as many names as input files (in order)")
 
-    if args.no_simplification:
-        with open("simplified") as f:
-            exclude = set(q.strip() for q in f.readlines())
-        with open("immediate-solve") as f:
-            exclude = exclude.union(set(q.strip() for q in f.readlines()))
-
-    inputs: Dict[str, Dict[str, Tuple[str, float, int, int]]] = {}
+    # The answers obtained by query simplification and those above the time limit are left out when loading, by the database for a results database.
+    exclude_sets = SIMPLIFICATION_SETS if args.no_simplification else ()
+    inputs: Dict[str, Dataset] = {}
     n_inputs = len(args.inputs)
     for name, input in zip(args.names, args.inputs):
-        with open(input, "r") as file:
-            reader = csv.reader(file)
-            inputs[name] = {
-                x[0]: (x[1], float(x[2]), int(x[3]), int(x[4]) if len(x) > 4 else 0)
-                for x in reader
-                if (args.time_limit is None or float(x[2]) <= args.time_limit)
-                and (not args.no_simplification or x[0] not in exclude)
-            }
-
-    if args.weak is not None:
-        master = set(inputs[args.names[args.weak]].keys())
-        for name, input in inputs.items():
-            if name == args.names[args.weak]:
-                continue
+        inputs[name] = load_input(input, exclude_sets, args.time_limit)
 
-            to_remove = set(input.keys()) - master
+    results = ResultMatrix.from_datasets(inputs)
 
-            for query in to_remove:
-                del input[query]
+    if args.weak is not None:
+        results = results.select(results.solved[args.weak])
 
     if args.filter is not None:
-        queries = set(args.filter.read().splitlines())
-        for name, input in inputs.items():
-            to_remove = set(input.keys()) - queries
-            for query in to_remove:
-                del input[query]
+        results = results.select(results.query_mask(query_set(q.strip() for q in args.filter if q.strip())))
 
-    all_queries: Optional[Set[str]] = None
     if args.intersection:
-        all_queries = reduce(
-            lambda acc, i: acc.union(set(i.keys())), inputs.values(), set()
-        )
-        query_intersection: Set[str] = reduce(
-            set.intersection, map(lambda x: set(x.keys()), inputs.values())
-        )
-
-        to_remove = all_queries - query_intersection
-
-        for query in to_remove:
-            for input in inputs.values():
-                if query in input:
-                    del input[query]
+        results = results.intersection()
 
     if args.output_file:
         outfile_base = args.output_file
@@ -156,101 +338,35 @@ if __name__ == "__main__":
         outfile_base = f"{'-'.join(args.names)}"
 
     if args.virtual_best:
-        virtual_best = {}
-        if all_queries is None:
-            all_queries = reduce(
-                lambda acc, i: acc.union(set(i.keys())), inputs.values(), set()
-            )
-        for query in all_queries:
-            answers = [input[query] for input in inputs.values() if query in input.keys()]
-            t = min(answer[1] for answer in answers)
-            mem = min(answer[2] for answer in answers)
-            states = min(answer[3] for answer in answers)
-            virtual_best[query] = (query, t, mem, states)
-        inputs["Virtual Best Solver"] = virtual_best
+        results = results.with_virtual_best()
 
-    fig, ax = plt.subplots()
-    linestyles = ['-', '--', '-.', ':', (0, (3,1,1,1)), (0, (5, 1)), (0, (3, 3,1,3,1,3))]
-    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
-    if args.less_styles:
-        linestyles = linestyles[1:]
-        colors = colors[1:]
-    vbslinestyle = (0, (5, 2, 1, 2, 1, 2))
-    vbscolor = '#000000'
-    plt.yscale('log')
-    #ax.yaxis.set_major_formatter(ticker.FuncFormatter(format_logdecimal))
-    #ax.yaxis.set_minor_formatter(ticker.FuncFormatter(format_logdecimal))
-    formatter = ticker.LogFormatter(minor_thresholds=(2, 1))
-    ax.yaxis.set_major_formatter(formatter)
-    ax.yaxis.set_minor_formatter(formatter)
-    x_maxes = []
-    time_series = {}
-    for i, (name, input) in enumerate(inputs.items()):
-        time = sorted(
-            [t for _, t, _, _ in input.values() if (args.limit is None or t < args.limit) and (args.min is None or t >= args.min)]
-        )
-        time_series[name] = time
-        x_maxes.append(len(time))
-        n_below = len(input.values()) - len(time)
+    if args.format is None:
+        args.format = "png" if args.preview else "pdf"
+    if args.dpi is None:
+        args.dpi = PREVIEW_DPI if args.preview else DPI
+    if args.max_points is None:
+        args.max_points = PREVIEW_POINTS if args.preview else None
+    elif args.max_points == 0:
+        args.max_points = None
 
-        linestyle = vbslinestyle if name == "Virtual Best Solver" else linestyles[i]
-        color = vbscolor if name == "Virtual Best Solver" else colors[i]
-        path = plt.plot(range(n_below, n_below + len(time)), time,
-                        linestyle=linestyle, color=color, label=f"{name} ($n={len(input.values())}$)")
-        # c=path.get_facecolors()[0].tolist()
-        if args.max_line:
-            plt.axvline(len(time), c='k', linestyle='--')
-
-    if args.tail:
-        if args.virtual_best:
-            cut = max(x_maxes[:-1]) - args.tail
-        else:
-            cut = max(x_maxes) - args.tail
-        plt.xlim(left=cut, right=max(x_maxes) + 5)
-        ybot = 0.8 * min(T[cut] for T in time_series.values())
-        ytop = 1.2 * max(T[-1] for T in time_series.values())
-        plt.ylim(ybot, ytop)
+    plots = list(args.plots)
+    if args.explored and "explored" not in plots:
+        plots.append("explored")
+    args.plots = plots
+    args.output_file = outfile_base
 
+    views = [make_view(args, {})]
+    if args.spec is not None:
+        views = [make_view(args, entry) for entry in json.load(args.spec)]
 
-    if not args.no_legend:
-        plt.legend()
-    plt.title("Time (in seconds)")
-    if args.limit is not None:
-        plt.ylim(top=args.limit)
-    if args.min is not None:
-        plt.ylim(bottom=args.min)
-
-    plt.savefig(f"{outfile_base}-time.{args.format}", format=args.format, bbox_inches="tight", dpi=1000)
-    plt.clf()
-    sys.exit(0)
-
-    fig, ax = plt.subplots()
-    plt.yscale('log')
-    ax.yaxis.set_major_formatter(ticker.FuncFormatter(format_logdecimal))
-    for i, (name, input) in enumerate(inputs.items()):
-        memory = sorted([m / 1024 for _, _, m, _ in input.values()])
-        plt.plot(range(len(memory)), memory, linestyle=linestyle, label=f"{name} ($n={len(input.values())}$)")
-
-    if not args.no_legend:
-        plt.legend()
-    plt.title("Memory (in MB)")
-    #if args.limit is not None:
-    #    plt.ylim(0, args.limit)
-    plt.savefig(f"{outfile_base}-memory.{args.format}", format=args.format, bbox_inches="tight", dpi=1000)
-    plt.clf()
-
-    if args.explored:
-        fig, ax = plt.subplots()
-        plt.yscale('log')
-        ax.yaxis.set_major_formatter(ticker.LogFormatter())
-        for i, (name, input) in enumerate(inputs.items()):
-            explored = sorted([explored for _, _, _, explored in input.values()])
-            plt.plot(range(len(explored)), explored, linestyle=linestyles[i], label=f"{name} ($n={len(input.values())}$)")
-
-        if not args.no_legend:
-            plt.legend()
-        plt.title("Explored states")
-        #if args.limit is not None:
-        #    plt.ylim(0, args.limit)
-        plt.savefig(f"{outfile_base}-explored.{args.format}", format=args.format, bbox_inches="tight", dpi=1000)
-        plt.clf()
+    tasks = [(view, plot) for view in views for plot in view.plots]
+    if not tasks:
+        print("No plots to render", file=sys.stderr)
+        sys.exit(0)
+    if args.jobs == 1 or len(tasks) == 1:
+        _init_worker(results, args.preview)
+        for task in tasks:
+            render(task)
+    else:
+        with Pool(min(args.jobs or os.cpu_count(), len(tasks)), initializer=_init_worker, initargs=(results, args.preview)) as pool:
+            pool.map(render, tasks)
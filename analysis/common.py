@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 
+from array import array as _array
 from collections import namedtuple as _namedtuple
 from typing import List, Dict, IO, Iterable, Tuple, Any
 import itertools as _itertools
 import csv as _csv
 import os as _os
+import struct as _struct
 import sys as _sys
 import argparse as _argparse
 
@@ -14,21 +16,303 @@ args: Any = None
 
 Row = _namedtuple("Row", ["query", "answer", "time", "memory", "states"])
 
-def import_csv(file):
+ANSWERS = ("FALSE", "TRUE")
+CATEGORIES = ("LTLC", "LTLF")
+
+
+def category_code(query: str) -> int:
+    for code, category in enumerate(CATEGORIES):
+        if query.endswith(category):
+            return code
+    return -1
+
+
+class Dataset:
+    """Columnar representation of the rows of a result CSV.
+
+    Each query name is stored once in `queries`, and `index` maps it to its row number.
+    The remaining columns are typed arrays indexed by row number. Answers are stored as
+    indices into `answer_names` (starting with ANSWERS) and categories as indices into
+    CATEGORIES (-1 for other queries). `ids` holds the query IDs of the rows (see queries.py), so
+    query sets are tested without looking up the names again.
+
+    For compatibility, a dataset can be used as a read-only Dict[str, Row].
+    """
+
+    def __init__(self):
+        self.queries: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.answer_names: List[str] = list(ANSWERS)
+        self.answer = _array("B")
+        self.category = _array("b")
+        self.time = _array("d")
+        self.memory = _array("d")
+        self.states = _array("q")
+        self.ids = _array("q")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Row]) -> "Dataset":
+        dataset = cls()
+        for row in rows:
+            dataset.append(*row)
+        return dataset
+
+    def answer_code(self, answer: str) -> int:
+        try:
+            return self.answer_names.index(answer)
+        except ValueError:
+            self.answer_names.append(answer)
+            return len(self.answer_names) - 1
+
+    def append(self, query: str, answer: str, time: float, memory: float, states: int):
+        """Add a row. A row for a query already in the dataset replaces the existing row."""
+        i = self.index.get(query)
+        if i is not None:
+            self.answer[i] = self.answer_code(answer)
+            self.time[i] = time
+            self.memory[i] = memory
+            self.states[i] = states
+            return
+        from queries import UNIVERSE
+        self.index[query] = len(self.queries)
+        self.queries.append(_sys.intern(query))
+        self.ids.append(UNIVERSE.id(query))
+        self.answer.append(self.answer_code(answer))
+        self.category.append(category_code(query))
+        self.time.append(time)
+        self.memory.append(memory)
+        self.states.append(states)
+
+    def extend(self, queries: List[str], answers: List[str], time: List[float], memory: List[float], states: List[int]):
+        """Add rows given as columns. Like append, a row for a query already in the dataset replaces the existing row."""
+        queries = list(map(_sys.intern, queries))
+        start = len(self.queries)
+        index = dict(zip(queries, range(start, start + len(queries))))
+        if len(index) != len(queries) or not self.index.keys().isdisjoint(index):
+            for row in zip(queries, answers, time, memory, states):
+                self.append(*row)
+            return
+        from queries import UNIVERSE
+        codes = {answer: self.answer_code(answer) for answer in dict.fromkeys(answers)}
+        self.index.update(index)
+        self.queries.extend(queries)
+        self.ids.extend(UNIVERSE.ids(queries))
+        self.answer.extend(map(codes.__getitem__, answers))
+        self.category.extend(map(category_code, queries))
+        self.time.extend(time)
+        self.memory.extend(memory)
+        self.states.extend(states)
+
+    def row(self, i: int) -> Row:
+        return Row(self.queries[i], self.answer_names[self.answer[i]], self.time[i], self.memory[i], self.states[i])
+
+    def mask(self, category: str = None, answer: str = None, include=None, exclude=None,
+             min_time: float = None, max_time: float = None):
+        """Boolean NumPy array telling for each row whether it satisfies all of the given conditions (see select)."""
+        import numpy as np
+        mask = np.ones(len(self.queries), dtype=bool)
+        if len(self.queries) == 0:
+            return mask
+        if category is not None:
+            mask &= np.frombuffer(self.category, dtype=np.int8) == CATEGORIES.index(category)
+        if answer is not None:
+            code = self.answer_names.index(answer) if answer in self.answer_names else -1
+            mask &= np.frombuffer(self.answer, dtype=np.uint8) == code
+        if min_time is not None:
+            mask &= np.frombuffer(self.time, dtype=np.float64) >= min_time
+        if max_time is not None:
+            mask &= np.frombuffer(self.time, dtype=np.float64) <= max_time
+        if include is not None:
+            mask &= self._query_mask(include)
+        if exclude:
+            mask &= ~self._query_mask(exclude)
+        return mask
+
+    def select(self, category: str = None, answer: str = None, include=None, exclude=None,
+               min_time: float = None, max_time: float = None) -> List[int]:
+        """Return the row numbers of the rows satisfying all of the given conditions.
+
+        include and exclude are QuerySets or other collections of query names, and the time bounds are inclusive.
+        """
+        import numpy as np
+        return np.flatnonzero(self.mask(category, answer, include, exclude, min_time, max_time)).tolist()
+
+    def _query_mask(self, queries):
+        """Boolean mask of the rows of the given queries, by their IDs if queries is a QuerySet."""
+        import numpy as np
+        from queries import UNIVERSE, QuerySet
+        if isinstance(queries, QuerySet) and queries.universe is UNIVERSE:
+            return queries.mask(self.ids)
+        return np.fromiter((query in queries for query in self.queries), dtype=bool, count=len(self.queries))
+
+    def query_set(self):
+        """The queries of the dataset as a QuerySet (see queries.py)."""
+        from queries import QuerySet
+        return QuerySet.from_ids(self.ids)
+
+    def subset(self, selected: Iterable[int]) -> "Dataset":
+        selected = list(selected)
+        dataset = Dataset()
+        dataset.answer_names = list(self.answer_names)
+        dataset.queries = [self.queries[i] for i in selected]
+        dataset.index = {query: i for i, query in enumerate(dataset.queries)}
+        for name in ("answer", "category", "time", "memory", "states", "ids"):
+            column = getattr(self, name)
+            getattr(dataset, name).extend([column[i] for i in selected])
+        return dataset
+
+    def filter(self, **conditions) -> "Dataset":
+        """Return a new dataset with the rows satisfying the conditions (see select)."""
+        return self.subset(self.select(**conditions))
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __contains__(self, query):
+        return query in self.index
+
+    def __iter__(self):
+        return iter(self.queries)
+
+    def __getitem__(self, query: str) -> Row:
+        return self.row(self.index[query])
+
+    def keys(self):
+        return self.index.keys()
+
+    def values(self):
+        return (self.row(i) for i in range(len(self.queries)))
+
+    def items(self):
+        return ((self.queries[i], self.row(i)) for i in range(len(self.queries)))
+
+
+    def write_binary(self, file):
+        """Write the dataset to a binary file opened in binary mode. See read_binary."""
+        queries = "\n".join(self.queries).encode()
+        answer_names = "\n".join(self.answer_names).encode()
+        file.write(_struct.pack(_BINARY_HEADER, _BINARY_MAGIC, _sys.byteorder == "little",
+                                len(self.queries), len(answer_names), len(queries)))
+        file.write(answer_names)
+        file.write(queries)
+        for column in (self.answer, self.category, self.time, self.memory, self.states):
+            column.tofile(file)
+
+    @classmethod
+    def read_binary(cls, file) -> "Dataset":
+        """Read a dataset written by write_binary. Returns None if the file is not a dataset in native byte order,
+        or (with a warning) if its size does not match its header, e.g. because it was truncated."""
+        data = memoryview(file.read())
+        header_size = _struct.calcsize(_BINARY_HEADER)
+        if len(data) < header_size:
+            return None
+        magic, little, n, names_size, queries_size = _struct.unpack_from(_BINARY_HEADER, data)
+        if magic != _BINARY_MAGIC or little != (_sys.byteorder == "little"):
+            return None
+        dataset = cls()
+        columns = (dataset.answer, dataset.category, dataset.time, dataset.memory, dataset.states)
+        expected = header_size + names_size + queries_size + n * sum(column.itemsize for column in columns)
+        if len(data) != expected:
+            print(f"Ignoring {getattr(file, 'name', 'the binary dataset')}: expected {expected} bytes but found {len(data)}",
+                  file=_sys.stderr)
+            return None
+        offset = header_size
+        dataset.answer_names = str(data[offset:offset + names_size], "utf-8").split("\n")
+        offset += names_size
+        dataset.queries = str(data[offset:offset + queries_size], "utf-8").split("\n") if n > 0 else []
+        offset += queries_size
+        dataset.index = {query: i for i, query in enumerate(dataset.queries)}
+        from queries import UNIVERSE
+        dataset.ids = _array("q", UNIVERSE.ids(dataset.queries))
+        for column in columns:
+            size = n * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            offset += size
+        return dataset
+
+
+_BINARY_MAGIC = b"LTLDATA1"
+_BINARY_HEADER = "<8s?QQQ"
+
+# Number of rows import_csv parses at a time.
+_IMPORT_CHUNK = 1 << 10
+
+# Suffix of the binary representation of a CSV file written by to_csv.py --binary.
+SIDECAR_SUFFIX = ".bin"
+
+
+def _import_sidecar(file):
+    """Load the binary sidecar of the CSV file, if it exists and is newer than the CSV."""
+    name = getattr(file, "name", None)
+    if not isinstance(name, str):
+        return None
+    sidecar = name + SIDECAR_SUFFIX
+    try:
+        if _os.path.getmtime(sidecar) < _os.path.getmtime(name):
+            return None
+        with open(sidecar, "rb") as f:
+            return Dataset.read_binary(f)
+    except OSError:
+        return None
+
+
+def write_sidecar(dataset: Dataset, path: str):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        dataset.write_binary(f)
+    _os.replace(tmp, path)
+
+
+def import_csv(file) -> Dataset:
+    """Import a result CSV. If the file has an up-to-date binary sidecar (see SIDECAR_SUFFIX), it is loaded instead."""
+    dataset = _import_sidecar(file)
+    if dataset is not None:
+        return dataset
     reader = _csv.reader(file)
-    rows = {}
-    for row in reader:
-        if len(row) < 5:
-            row.append(-1)
-        query = row[0].strip()
-        rows[query] = Row(
-            query=query,
-            answer=row[1].strip(),
-            time=float(row[2]),
-            memory=float(row[3]),
-            states=int(row[4]) if len(row) > 4 else -1,
+    dataset = Dataset()
+    # Rows are added a chunk of columns at a time, which keeps the rows of only one chunk in memory.
+    while True:
+        rows = list(_itertools.islice(reader, _IMPORT_CHUNK))
+        if not rows:
+            return dataset
+        dataset.extend(
+            [row[0].strip() for row in rows],
+            [row[1].strip() for row in rows],
+            [float(row[2]) for row in rows],
+            [float(row[3]) for row in rows],
+            [int(row[4]) if len(row) > 4 else -1 for row in rows],
         )
-    return rows
+
+
+def load_input(spec: str, exclude_sets: Iterable[str] = (), max_time: float = None) -> Dataset:
+    """Load the results given as a CSV file or as `<database>:<configuration>` for a results database (see results_db.py).
+
+    The queries of the named query lists (see load_query_set) and the answers slower than max_time
+    seconds are left out. A results database leaves them out in its query.
+    """
+    import results_db
+    exclude_sets = list(exclude_sets)
+    if results_db.is_database_input(spec):
+        with results_db.open_input(spec) as (conn, configuration):
+            return results_db.load_dataset(conn, configuration, exclude_sets, max_time)
+    with open(spec) as file:
+        data = import_csv(file)
+    if exclude_sets or max_time is not None:
+        data = data.filter(exclude=load_query_set(spec, *exclude_sets) if exclude_sets else None, max_time=max_time)
+    return data
+
+
+def load_query_set(spec: str, *names: str):
+    """The union of the named query lists (e.g. exclude) of an input as a QuerySet.
+
+    These are the query sets stored in the database of a `<database>:<configuration>` input, and the files of these names otherwise.
+    """
+    import results_db
+    from queries import query_set, read_query_set
+    if not results_db.is_database_input(spec):
+        return read_query_set(*names)
+    with results_db.open_input(spec) as (conn, _):
+        return query_set(q for name in names for q in results_db.query_set(conn, name))
 
 
 def get_argument_parser() -> _argparse.ArgumentParser:
@@ -38,8 +322,8 @@ def get_argument_parser() -> _argparse.ArgumentParser:
     parser.add_argument(
         "-i",
         "--input",
-        type=_argparse.FileType("r"),
-        help="Input file. If omitted stdin is used.",
+        type=str,
+        help="Input files, or <database>:<configuration> for results in a results database.",
         nargs="+",
     )
     parser.add_argument(
@@ -62,6 +346,13 @@ def get_argument_parser() -> _argparse.ArgumentParser:
         help="Minimum amount of time outside of number of answers tables (in s).",
         default=5
     )
+    parser.add_argument(
+        "-p",
+        "--point-threshold",
+        type=float,
+        help="Percentage of the value of the other configuration that a configuration must stay below to score a point when comparing time, memory or states. Defaults to 100 (any improvement).",
+        default=100
+    )
     parser.add_argument(
         "-q",
         "--query-simplification",
@@ -167,36 +458,94 @@ def table_footer():
 ########### Computations ################
 exclude = None
 
-def _query_filter(row):
+def get_exclude():
+    """The set of excluded queries (a QuerySet), or None if answers obtained by query simplification are included."""
     global exclude
-    global immediately_solved
     if args.query_simplification:
-        return True
+        return None
     if exclude is None:
-        with open("exclude") as f:
-            exclude = set(q.strip() for q in f.readlines())
-    return row.query not in exclude
+        from queries import read_query_set
+        exclude = read_query_set("exclude")
+    return exclude
+
+
+def _query_filter(data: Dataset, i: int):
+    """Whether row i of data is not excluded."""
+    excluded = get_exclude()
+    return excluded is None or not excluded.contains_id(data.ids[i])
+
+
+def _get_rows(data: Dataset, category, answer, use_filter):
+    selected = data.select(category=category, answer=answer, exclude=get_exclude() if use_filter else None)
+    return ((data.queries[i], data.row(i)) for i in selected)
+
+
+def get_ltlc_positive(data: Dataset, use_filter=True):
+    return _get_rows(data, "LTLC", "TRUE", use_filter)
+
+def get_ltlc_negative(data: Dataset, use_filter=True):
+    return _get_rows(data, "LTLC", "FALSE", use_filter)
+
+def get_ltlf_positive(data: Dataset, use_filter=True):
+    return _get_rows(data, "LTLF", "TRUE", use_filter)
 
+def get_ltlf_negative(data: Dataset, use_filter=True):
+    return _get_rows(data, "LTLF", "FALSE", use_filter)
 
-def get_ltlc_positive(data: Dict[str, Row], use_filter=True):
-    return filter(lambda r: r[1].query.endswith('LTLC')
-                  and r[1].answer == "TRUE"
-                  and (_query_filter(r[1]) if use_filter else True), data.items())
+# The (category, answer) buckets in the column order of the tables.
+PARTITION_COLUMNS = [("LTLC", "TRUE"), ("LTLC", "FALSE"), ("LTLF", "TRUE"), ("LTLF", "FALSE")]
 
-def get_ltlc_negative(data: Dict[str, Row], use_filter=True):
-    return filter(lambda r: r[1].query.endswith('LTLC')
-                  and r[1].answer == "FALSE"
-                  and (_query_filter(r[1]) if use_filter else True), data.items())
 
-def get_ltlf_positive(data: Dict[str, Row], use_filter=True):
-    return filter(lambda r: r[1].query.endswith('LTLF')
-                  and r[1].answer == "TRUE"
-                  and (_query_filter(r[1]) if use_filter else True), data.items())
+class Partition:
+    """The rows of a dataset classified into (category, answer) buckets in a single pass.
+
+    Rows of other categories or answers, and excluded rows if use_filter is set, are not in any bucket.
+    """
+
+    def __init__(self, data: Dataset, use_filter=True):
+        self.data = data
+        self.buckets: Dict[Tuple[str, str], List[int]] = {
+            (category, answer): [] for category in CATEGORIES for answer in ANSWERS
+        }
+        # Bucket of the row with category code c and answer code a is found at c * len(ANSWERS) + a.
+        lists = [self.buckets[(category, answer)] for category in CATEGORIES for answer in ANSWERS]
+        n_answers = len(ANSWERS)
+        excluded = get_exclude() if use_filter else None
+        for i, (c, a, q) in enumerate(zip(data.category, data.answer, data.ids)):
+            if c < 0 or a >= n_answers:
+                continue
+            if excluded and excluded.contains_id(q):
+                continue
+            lists[c * n_answers + a].append(i)
+
+    def count(self, category: str, answer: str) -> int:
+        return len(self.buckets[(category, answer)])
+
+    def counts(self, columns=PARTITION_COLUMNS) -> List[int]:
+        return [self.count(category, answer) for category, answer in columns]
+
+    def rows(self, category: str, answer: str) -> Iterable[Tuple[str, Row]]:
+        return ((self.data.queries[i], self.data.row(i)) for i in self.buckets[(category, answer)])
+
+    @property
+    def total(self) -> int:
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+
+def count_input(spec: str, use_filter=True) -> List[int]:
+    """The number of answers of an input per PARTITION_COLUMNS, like Partition.counts.
+
+    A results database counts the answers of a `<database>:<configuration>` input itself, leaving
+    out the queries of its `exclude` query set.
+    """
+    import results_db
+    if not results_db.is_database_input(spec):
+        return Partition(load_input(spec), use_filter).counts()
+    exclude_sets = ["exclude"] if use_filter and not args.query_simplification else []
+    with results_db.open_input(spec) as (conn, configuration):
+        counts = results_db.count_answers(conn, configuration, exclude_sets)
+    return [counts.get(column, 0) for column in PARTITION_COLUMNS]
 
-def get_ltlf_negative(data: Dict[str, Row], use_filter=True):
-    return filter(lambda r: r[1].query.endswith('LTLF')
-                  and r[1].answer == "FALSE"
-                  and (_query_filter(r[1]) if use_filter else True), data.items())
 
 def calculate_score(base, other, pred: str = None):
     ntime = 0
@@ -234,32 +583,43 @@ def exclusive_answers(left, right):
 
 N_QUERIES = 1016 * 2 * 16
 
-def num_answers_table(dataset, args, fname="num-answered.tex"):
+def num_answers_table(counts: Dict[str, List[int]], args, fname="num-answered.tex"):
+    """The table of the number of answers of each configuration, given per PARTITION_COLUMNS (see Partition.counts and count_input)."""
     # TODO exclusive answers?
     with open_file(fname, "w") as f:
         table_header("lrrrrrr")
         table_head_row(["", "LTLC$+$", "LTLC$-$", "LTLF$+$", "LTLF$-$", r"\multicolumn{2}{c}{Total}"])
         table_midrule()
 
-        for name, data in dataset.items():
-            ltlc_pos = list(get_ltlc_positive(data))
-            ltlc_neg = list(get_ltlc_negative(data))
-            ltlf_pos = list(get_ltlf_positive(data))
-            ltlf_neg = list(get_ltlf_negative(data))
-            ntotal = len(ltlc_pos) + len(ltlc_neg) + len(ltlf_pos) + len(ltlf_neg)
+        for name, row in counts.items():
+            ntotal = sum(row)
             table_row([
                 name,
-                len(ltlc_pos),
-                len(ltlc_neg),
-                len(ltlf_pos),
-                len(ltlf_neg),
+                *row,
                 ntotal,
-                f"\\SI{{{ntotal / (N_QUERIES - len(exclude)):.1%}}}{{\percent}}".replace("%", ""),
+                f"\\SI{{{ntotal / (N_QUERIES - len(get_exclude() or ())):.1%}}}{{\percent}}".replace("%", ""),
             ])
 
         table_footer()
 
 
+SCORE_TITLES = {"time": "Faster", "memory": "Less memory", "states": "Fewer states", "exclusive": "Exclusive"}
+
+
+def comparison_tables(names, scores, fname="comparison.tex"):
+    """A table per comparison of the points of each configuration (row) over each other configuration (column), see ResultMatrix.scores."""
+    with open_file(fname, "w") as f:
+        for score, values in scores.items():
+            soutln(f"% {SCORE_TITLES.get(score, score)}")
+            table_header("l" + "r" * len(names))
+            table_head_row([SCORE_TITLES.get(score, score), *names])
+            table_midrule()
+            for i, name in enumerate(names):
+                table_row([name, *("--" if i == j else int(values[i][j]) for j in range(len(names)))])
+            table_footer()
+            soutln("")
+
+
 def percentage_comparison(dataset, args, fname="percentage-diff.tex"):
     def _percent_diff(a, b):
         return f"\\SI{{{(a - b) / b:.1%}}}{{\\percent}}".replace("%", "")
@@ -269,25 +629,15 @@ def percentage_comparison(dataset, args, fname="percentage-diff.tex"):
         table_head_row(["", "LTLC$+$", "LTLC$-$", "LTLF$+$", "LTLF$-$", "Total"])
         table_midrule()
 
-        baseline = dataset["Baseline"]
-        base_ltlc_pos = len(list(get_ltlc_positive(baseline)))
-        base_ltlc_neg = len(list(get_ltlc_negative(baseline)))
-        base_ltlf_pos = len(list(get_ltlf_positive(baseline)))
-        base_ltlf_neg = len(list(get_ltlf_negative(baseline)))
-        base_total = base_ltlc_pos + base_ltlc_neg + base_ltlf_pos + base_ltlf_neg
+        base = Partition(dataset["Baseline"])
+        base_counts = base.counts()
+        base_total = base.total
         del dataset["Baseline"]
         for name, data in dataset.items():
-            ltlc_pos = len(list(get_ltlc_positive(data)))
-            ltlc_neg = len(list(get_ltlc_negative(data)))
-            ltlf_pos = len(list(get_ltlf_positive(data)))
-            ltlf_neg = len(list(get_ltlf_negative(data)))
-            ntotal = ltlc_pos + ltlc_neg + ltlf_pos + ltlf_neg
+            partition = Partition(data)
 
             table_row([name,
-                       _percent_diff(ltlc_pos, base_ltlc_pos),
-                       _percent_diff(ltlc_neg, base_ltlc_neg),
-                       _percent_diff(ltlf_pos, base_ltlf_pos),
-                       _percent_diff(ltlf_neg, base_ltlf_neg),
-                       _percent_diff(ntotal, base_total)])
+                       *(_percent_diff(count, base_count) for count, base_count in zip(partition.counts(), base_counts)),
+                       _percent_diff(partition.total, base_total)])
         table_footer()
 
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import csv
+import numpy as np
+
+from common import *
+from matrix import ResultMatrix
+
+
+if __name__ == "__main__":
+    parser = get_argument_parser()
+    parser.add_argument("-c", "--category", choices=CATEGORIES, help="Compare only the queries of this category.")
+    parser.add_argument("--csv", help="Also write the matrices to this CSV file as rows of comparison, configuration, other configuration and points.")
+    args = parse_program_arguments(parser)
+
+    dataset = {}
+    for input, name in zip(args.input, args.names):
+        dataset[name] = load_input(input)
+
+    results = ResultMatrix.from_datasets(dataset)
+    excluded = get_exclude()
+    if excluded is not None:
+        results = results.select(~results.query_mask(excluded))
+    if args.category is not None:
+        results = results.select(np.array([query.endswith(args.category) for query in results.queries], dtype=bool))
+
+    scores = results.scores(args.point_threshold / 100.0, args.min_time)
+    comparison_tables(results.names, scores, args.output)
+
+    if args.csv is not None:
+        with open(args.csv, "w") as file:
+            writer = csv.writer(file, lineterminator="\n")
+            writer.writerow(["comparison", "configuration", "other", "points"])
+            for score, values in scores.items():
+                for i, name in enumerate(results.names):
+                    for j, other in enumerate(results.names):
+                        if i != j:
+                            writer.writerow([score, name, other, int(values[i, j])])
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+"""A long-running analysis service keeping the results, oracles and query lists in memory.
+
+The daemon listens on a Unix socket for requests, each a JSON object on a line, and answers each
+with a JSON line {"ok": true, "result": ...} or {"ok": false, "error": "..."}. Files are given
+relative to the "cwd" of the request and loaded on first use (or at startup, see -p), and are
+reloaded when their size or modification time changes: the loaded files are checked every few
+seconds, and again when a request uses them. The requests are
+
+- {"op": "stats", "inputs": [...], "names": [...], "oracle": [...], "no_query": bool, "upper": minutes}:
+  the statistics of stats-generator.py, a list of {"stats": ..., "mismatch": [rows]},
+- {"op": "table", "inputs": [...], "names": [...], "output": path, "query_simplification": bool}:
+  writes the table of make-table.py,
+- {"op": "count", "input": ..., "category": "LTLF", "answer": "FALSE", "min_time": 5, "max_time": ..., "exclude": bool}:
+  the number of matching answers, e.g. how many LTLF FALSE a configuration answered above 5 seconds,
+- {"op": "series", "inputs": [...], "names": [...], "column": "time", "no_simplification": bool,
+  "time_limit": seconds, "virtual_best": bool}: the sorted series of the cactus plots,
+- {"op": "status"}: the loaded files, and {"op": "shutdown"}.
+
+stats-generator.py and make-table.py send their requests here with -d/--daemon SOCKET.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+from typing import Callable, Dict
+
+DEFAULT_SOCKET = ".analysis.sock"
+
+
+def request(socket_path: str, message: dict):
+    """Send a request to the daemon listening on socket_path and return its result. The files are relative to the current directory."""
+    message = dict(message, cwd=os.getcwd())
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(message).encode() + b"\n")
+        with connection.makefile("rb") as file:
+            response = json.loads(file.readline())
+    if not response["ok"]:
+        raise RuntimeError(f"The analysis daemon failed: {response['error']}")
+    return response["result"]
+
+
+def _stat_path(spec: str) -> str:
+    """The file of an input, which may be <database>:<configuration>."""
+    import results_db
+    return spec.rpartition(":")[0] if results_db.is_database_input(spec) else spec
+
+
+class FileCache:
+    """Values loaded from files, reloaded when the size or modification time of the file changes."""
+
+    def __init__(self, load: Callable, stat_path: Callable[[str], str] = lambda path: path):
+        self.load = load
+        self.stat_path = stat_path
+        self.entries: Dict[str, tuple] = {}
+
+    def _stamp(self, key):
+        stat = os.stat(self.stat_path(key))
+        return stat.st_size, stat.st_mtime_ns
+
+    def get(self, key: str):
+        stamp = self._stamp(key)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != stamp:
+            entry = (stamp, self.load(key), time.time())
+            self.entries[key] = entry
+        return entry[1]
+
+    def stale(self):
+        """The keys whose files changed or disappeared since they were loaded."""
+        stale = []
+        for key, entry in self.entries.items():
+            try:
+                if self._stamp(key) != entry[0]:
+                    stale.append(key)
+            except OSError:
+                stale.append(key)
+        return stale
+
+    async def refresh(self, loop):
+        """Reload the changed files in a thread, so requests are answered meanwhile. Entries of removed files are dropped."""
+        for key in self.stale():
+            try:
+                stamp = self._stamp(key)
+                value = await loop.run_in_executor(None, self.load, key)
+            except OSError:
+                del self.entries[key]
+                continue
+            self.entries[key] = (stamp, value, time.time())
+            print(f"Reloaded {key}", file=sys.stderr)
+
+
+class AnalysisService:
+    def __init__(self):
+        from common import load_input
+        from oracle import OracleFile
+        from queries import read_query_set
+        self.datasets = FileCache(load_input, _stat_path)
+        self.query_sets = FileCache(read_query_set)
+        self.oracles = FileCache(OracleFile)
+        self.caches = [self.datasets, self.query_sets, self.oracles]
+
+    @staticmethod
+    def _path(message, path):
+        return os.path.abspath(os.path.join(message.get("cwd", ""), path))
+
+    def _query_set(self, message, *names):
+        from queries import QuerySet
+        queries = QuerySet()
+        for name in names:
+            queries |= self.query_sets.get(self._path(message, name))
+        return queries
+
+    def _inputs(self, message):
+        names = message.get("names") or message["inputs"]
+        if len(names) != len(message["inputs"]):
+            raise RuntimeError("Mismatching number of inputs and names")
+        return {name: self.datasets.get(self._path(message, path)) for name, path in zip(names, message["inputs"])}
+
+    def stats(self, message):
+        from oracle import Oracle
+        from stats import compute_statistics, csv_row
+        oracle = Oracle.from_files([self.oracles.get(self._path(message, path)) for path in message.get("oracle", ["single-oracle"])])
+        exclude = self._query_set(message, "simplified", "immediate-solve") if message.get("no_query") else None
+        results = []
+        for name, data in self._inputs(message).items():
+            stats, bad = compute_statistics(name, data, oracle, exclude, message.get("upper"))
+            results.append({"stats": stats, "mismatch": [csv_row(row) for row in bad]})
+        return results
+
+    def table(self, message):
+        import common
+        from common import Partition
+        simplification = message.get("query_simplification", False)
+        common.args = argparse.Namespace(query_simplification=simplification)
+        common.exclude = None if simplification else self._query_set(message, "exclude")
+        output = self._path(message, message["output"])
+        try:
+            counts = {name: Partition(data).counts() for name, data in self._inputs(message).items()}
+            common.num_answers_table(counts, common.args, output)
+        finally:
+            common.exclude = None
+        return {"output": output}
+
+    def count(self, message):
+        data = self.datasets.get(self._path(message, message["input"]))
+        exclude = self._query_set(message, "exclude") if message.get("exclude") else None
+        return len(data.select(message.get("category"), message.get("answer"), exclude=exclude,
+                               min_time=message.get("min_time"), max_time=message.get("max_time")))
+
+    def series(self, message):
+        from matrix import ResultMatrix
+        results = ResultMatrix.from_datasets(self._inputs(message))
+        if message.get("time_limit") is not None:
+            results.unsolve(results.time > message["time_limit"])
+        if message.get("no_simplification"):
+            results = results.select(~results.query_mask(self._query_set(message, "simplified", "immediate-solve")))
+        if message.get("virtual_best"):
+            results = results.with_virtual_best()
+        column = message.get("column", "time")
+        return {"names": list(results.names),
+                "series": [results.series(i, column).tolist() for i in range(len(results.names))]}
+
+    def status(self, message):
+        return {name: {key: {"loaded": entry[2]} for key, entry in cache.entries.items()}
+                for name, cache in (("datasets", self.datasets), ("query_sets", self.query_sets), ("oracles", self.oracles))}
+
+    def handle(self, message):
+        handler = {"stats": self.stats, "table": self.table, "count": self.count, "series": self.series,
+                   "status": self.status}.get(message.get("op"))
+        if handler is None:
+            raise RuntimeError(f"Unknown request {message.get('op')}")
+        return handler(message)
+
+
+async def serve(socket_path: str, service: AnalysisService, interval: float):
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+    writers = set()
+
+    async def _client(reader, writer):
+        writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if message.get("op") == "shutdown":
+                        response = {"ok": True, "result": None}
+                        if not stopped.done():
+                            stopped.set_result(None)
+                    else:
+                        response = {"ok": True, "result": service.handle(message)}
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (asyncio.CancelledError, ConnectionError):
+            # The daemon is shutting down or the client went away.
+            pass
+        finally:
+            writers.discard(writer)
+            writer.close()
+
+    async def _watch():
+        while True:
+            await asyncio.sleep(interval)
+            for cache in service.caches:
+                await cache.refresh(loop)
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(_client, socket_path)
+    watcher = asyncio.ensure_future(_watch())
+    print(f"Listening on {socket_path}", file=sys.stderr)
+    try:
+        await stopped
+    finally:
+        watcher.cancel()
+        # Closing the connections first ends their handlers, which would otherwise be cancelled while reading.
+        for writer in list(writers):
+            writer.close()
+        server.close()
+        await server.wait_closed()
+        os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="This utility keeps results, oracles and query lists in memory and answers analysis requests on a Unix socket.")
+    parser.add_argument("-s", "--socket", default=DEFAULT_SOCKET, help=f"The socket to listen on. Defaults to {DEFAULT_SOCKET}.")
+    parser.add_argument("-p", "--preload", nargs="+", default=[], help="Input files (or <database>:<configuration>) to load at startup.")
+    parser.add_argument("-o", "--oracle", nargs="+", default=[], help="Oracle files to load at startup, e.g. single-oracle.")
+    parser.add_argument("-i", "--interval", type=float, default=2, help="Seconds between checks for changed files. Defaults to 2.")
+    parser.add_argument("-r", "--request", help="Send this request (a JSON object) to the daemon and print the result instead.")
+
+    args = parser.parse_args()
+
+    if args.request is not None:
+        print(json.dumps(request(args.socket, json.loads(args.request)), indent=2))
+        sys.exit(0)
+
+    service = AnalysisService()
+    for path in args.preload:
+        service.datasets.get(os.path.abspath(path))
+    for path in args.oracle:
+        service.oracles.get(os.path.abspath(path))
+    try:
+        asyncio.run(serve(args.socket, service, args.interval))
+    except KeyboardInterrupt:
+        pass
@@ -5,14 +5,27 @@ import os
 import sys
 import itertools
 #from typing import IO, List, Dict
+import common
 from common import *
 
 
 if __name__ == "__main__":
-    args = parse_program_arguments()
+    parser = get_argument_parser()
+    parser.add_argument("-d", "--daemon", help="Make the table in the analysis daemon listening on this socket (see daemon.py) instead.")
+    args = parse_program_arguments(parser)
 
-    dataset = {}
+    if args.daemon is not None:
+        import daemon
+        daemon.request(args.daemon, {"op": "table", "inputs": args.input, "names": args.names, "output": args.output,
+                                     "query_simplification": args.query_simplification})
+        sys.exit(0)
+
+    if not args.query_simplification:
+        # The excluded queries of the results database if the inputs are from one.
+        common.exclude = load_query_set(args.input[0], "exclude")
+
+    counts = {}
     for input, name in zip(args.input, args.names):
-        dataset[name] = import_csv(input)
+        counts[name] = count_input(input)
 
-    num_answers_table(dataset, args, args.output)
+    num_answers_table(counts, args, args.output)
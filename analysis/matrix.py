@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+"""Several datasets aligned onto a common query index for vectorized comparisons.
+
+Depends on NumPy (a dependency of matplotlib).
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from common import Dataset
+from queries import QuerySet
+
+VIRTUAL_BEST = "Virtual Best Solver"
+
+COLUMNS = ("time", "memory", "states")
+
+# The pairwise comparisons of ResultMatrix.scores.
+SCORES = ("time", "memory", "states", "exclusive")
+
+
+class ResultMatrix:
+    """Configurations × queries matrices of time, memory and states with NaN for unsolved queries.
+
+    `names` are the configurations (rows) and `queries` the query names (columns).
+    """
+
+    def __init__(self, names: List[str], queries: List[str], time, memory, states):
+        self.names = names
+        self.queries = queries
+        self.time = time
+        self.memory = memory
+        self.states = states
+        self._ids = None
+
+    @classmethod
+    def from_datasets(cls, datasets: Dict[str, Dataset], queries: Optional[List[str]] = None) -> "ResultMatrix":
+        """Align the datasets onto queries, by default the sorted union of the queries of all datasets."""
+        if queries is None:
+            queries = sorted(set().union(*(data.keys() for data in datasets.values())))
+        index = {query: i for i, query in enumerate(queries)}
+        shape = (len(datasets), len(queries))
+        time, memory, states = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        for c, data in enumerate(datasets.values()):
+            rows = np.fromiter((index.get(query, -1) for query in data.queries), dtype=np.int64, count=len(data))
+            known = rows >= 0
+            time[c, rows[known]] = np.frombuffer(data.time, dtype=np.float64)[known]
+            memory[c, rows[known]] = np.frombuffer(data.memory, dtype=np.float64)[known]
+            states[c, rows[known]] = np.frombuffer(data.states, dtype=np.int64)[known]
+        return cls(list(datasets), queries, time, memory, states)
+
+    @property
+    def solved(self):
+        return ~np.isnan(self.time)
+
+    def query_mask(self, queries: Iterable[str]):
+        """Boolean mask of the columns of the given queries (a QuerySet or any collection of names)."""
+        if isinstance(queries, QuerySet):
+            if self._ids is None:
+                self._ids = queries.universe.ids(self.queries)
+            return queries.mask(self._ids)
+        queries = set(queries)
+        return np.fromiter((query in queries for query in self.queries), dtype=bool, count=len(self.queries))
+
+    def select(self, mask) -> "ResultMatrix":
+        """Keep only the columns in the boolean mask."""
+        return ResultMatrix(self.names, [q for q, keep in zip(self.queries, mask) if keep],
+                            self.time[:, mask], self.memory[:, mask], self.states[:, mask])
+
+    def unsolve(self, mask):
+        """Mark the entries in the boolean configurations × queries mask as unsolved."""
+        for values in (self.time, self.memory, self.states):
+            values[mask] = np.nan
+
+    def intersection(self) -> "ResultMatrix":
+        return self.select(self.solved.all(axis=0))
+
+    def with_virtual_best(self, name=VIRTUAL_BEST) -> "ResultMatrix":
+        """Add a configuration that for each query solved by any configuration takes the best time, memory and states."""
+        solved = self.solved.any(axis=0)
+        rows = []
+        for values in (self.time, self.memory, self.states):
+            best = np.full(len(self.queries), np.nan)
+            best[solved] = np.nanmin(values[:, solved], axis=0)
+            rows.append(np.vstack([values, best]))
+        return ResultMatrix(self.names + [name], self.queries, *rows)
+
+    def count(self, c: int) -> int:
+        """The number of queries solved by configuration c."""
+        return int(np.count_nonzero(self.solved[c]))
+
+    def series(self, c: int, column="time"):
+        """The sorted values of the queries solved by configuration c (the cactus series)."""
+        values = getattr(self, column)[c]
+        return np.sort(values[self.solved[c]])
+
+    def scores(self, factor: float = 1.0, min_time: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Configurations × configurations matrices of the points of each configuration (row) over each other (column).
+
+        As in common.calculate_score, a point is scored for each query answered by the row but not the
+        column configuration (counted separately as "exclusive"), and for each query answered by both
+        where the time, memory or (positive) states of the row are below factor times those of the column.
+        Queries answered by both within min_time seconds by either are not compared.
+        """
+        solved = self.solved
+        row, column = solved[:, None, :], solved[None, :, :]
+        exclusive = row & ~column
+        both = row & column
+        if min_time:
+            both &= np.fmin(self.time[:, None, :], self.time[None, :, :]) > min_time
+        below = {
+            "time": self.time[:, None, :] < self.time[None, :, :] * factor,
+            "memory": self.memory[:, None, :] < self.memory[None, :, :] * factor,
+            "states": (self.states[:, None, :] > 0) & (self.states[:, None, :] < self.states[None, :, :] * factor),
+        }
+        scores = {column: (both & below[column]).sum(axis=2) + exclusive.sum(axis=2) for column in COLUMNS}
+        scores["exclusive"] = exclusive.sum(axis=2)
+        for values in scores.values():
+            np.fill_diagonal(values, 0)
+        return scores
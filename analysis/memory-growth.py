@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+"""Summarizes the memory growth of runs traced by sample_run.py, per configuration.
+
+For each run the growth rate is the least squares slope of the RSS over the last part of the run
+(--window), and the CPU utilization and major page fault rate are taken over the same part, so a
+run that timed out while still exploring (growing, busy) can be told apart from one that was
+thrashing near the memory limit (near the limit, idle, faulting).
+"""
+
+import argparse
+import csv
+import os
+import struct
+import sys
+
+import numpy as np
+
+# The trace format of sample_run.py.
+MAGIC = b"LTLTRAC1"
+HEADER = struct.Struct("<8sfIId")
+SAMPLE = np.dtype([("time", "<f4"), ("rss", "<u4"), ("utime", "<u4"), ("stime", "<u4"), ("minflt", "<u4"), ("majflt", "<u4")])
+END = struct.Struct("<4sifIi4x")
+END_TAG = b"END\0"
+
+RUN_FIELDS = ["configuration", "run", "outcome", "seconds", "peak_mib", "growth_mib_s", "cpu", "majflt_s"]
+SUMMARY_FIELDS = ["configuration", "runs", "answered", "timeout", "killed", "median_growth_mib_s", "p90_growth_mib_s",
+                  "median_peak_mib", "near_limit", "thrashing"]
+
+
+def read_trace(path):
+    """Returns the header (interval, ticks, page size, start), the samples and the end record (None if missing)."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size or data[:8] != MAGIC:
+        raise RuntimeError(f"{path} is not a trace file")
+    _, interval, ticks, page_size, start = HEADER.unpack_from(data)
+    body = data[HEADER.size:]
+    end = None
+    if len(body) >= END.size and body[-END.size:].startswith(END_TAG):
+        _, status, elapsed, maxrss, terminated = END.unpack(body[-END.size:])
+        end = {"status": status, "elapsed": elapsed, "maxrss": maxrss, "terminated": terminated}
+        body = body[:-END.size]
+    # A trace cut short (e.g. by SIGKILL) may end in a partial sample.
+    body = body[:len(body) - len(body) % SAMPLE.itemsize]
+    return (interval, ticks, page_size, start), np.frombuffer(body, dtype=SAMPLE), end
+
+
+def summarize_run(path, window):
+    """The outcome, duration, peak RSS, and the growth rate, CPU utilization and major fault rate over the last window of the run."""
+    (_, ticks, _, _), samples, end = read_trace(path)
+    if end is None or end["terminated"]:
+        outcome = "timeout"
+    elif end["status"] < 0:
+        outcome = "killed"
+    else:
+        outcome = "answered"
+    seconds = end["elapsed"] if end is not None else (float(samples["time"][-1]) if len(samples) else 0.0)
+    peak = max(int(samples["rss"].max()) if len(samples) else 0, end["maxrss"] if end is not None else 0) / 1024
+
+    tail = samples[samples["time"] >= (1 - window) * seconds] if len(samples) else samples
+    growth = cpu = majflt = float("nan")
+    if len(tail) >= 2:
+        t = tail["time"].astype(np.float64)
+        dt = t[-1] - t[0]
+        growth = np.polyfit(t, tail["rss"].astype(np.float64) / 1024, 1)[0]
+        if dt > 0:
+            used = (tail["utime"].astype(np.int64) + tail["stime"]) / ticks
+            cpu = (used[-1] - used[0]) / dt
+            majflt = (int(tail["majflt"][-1]) - int(tail["majflt"][0])) / dt
+    return [outcome, round(seconds, 2), round(peak, 1), round(growth, 3), round(cpu, 3), round(majflt, 3)]
+
+
+def summarize_configuration(name, runs, limit_mib, near):
+    """Aggregate the runs of a configuration. Runs near the limit reach near * limit; thrashing runs are also mostly idle."""
+    outcomes = [run[0] for run in runs]
+    growth = np.array([run[3] for run in runs], dtype=np.float64)
+    growth = growth[~np.isnan(growth)]
+    peaks = np.array([run[2] for run in runs], dtype=np.float64)
+    cpu = np.array([run[4] for run in runs], dtype=np.float64)
+    at_limit = peaks >= near * limit_mib
+    return [name, len(runs), outcomes.count("answered"), outcomes.count("timeout"), outcomes.count("killed"),
+            round(float(np.median(growth)), 3) if len(growth) else "", round(float(np.percentile(growth, 90)), 3) if len(growth) else "",
+            round(float(np.median(peaks)), 1) if len(peaks) else "", int(at_limit.sum()), int((at_limit & (cpu < 0.5)).sum())]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="This utility summarizes the memory growth of the runs traced by sample_run.py (see run_job.sh -s), as a CSV with a row per configuration.")
+    parser.add_argument("-i", "--input", nargs="+", required=True, help="Folders of trace files, e.g. output/mcc2020/foo/traces.")
+    parser.add_argument("-n", "--names", nargs="+", help="Names of the configurations. Defaults to the names of the experiment folders.")
+    parser.add_argument("-w", "--window", type=float, default=0.5, help="Fraction of the end of each run used for the rates. Defaults to 0.5.")
+    parser.add_argument("-l", "--limit", type=float, default=16, help="The memory limit in GiB. Defaults to 16.")
+    parser.add_argument("--near", type=float, default=0.9, help="Fraction of the limit counted as near the limit. Defaults to 0.9.")
+    parser.add_argument("--runs", help="Also write the summary of every run to this CSV file.")
+
+    args = parser.parse_args()
+
+    names = args.names or [os.path.basename(os.path.dirname(os.path.normpath(folder)))
+                           if os.path.basename(os.path.normpath(folder)) == "traces" else os.path.basename(os.path.normpath(folder))
+                           for folder in args.input]
+    if len(names) != len(args.input):
+        print("Error: Mismatching number of inputs and names", file=sys.stderr)
+        sys.exit(1)
+
+    runs_writer = None
+    if args.runs is not None:
+        runs_file = open(args.runs, "w")
+        runs_writer = csv.writer(runs_file, lineterminator="\n")
+        runs_writer.writerow(RUN_FIELDS)
+
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(SUMMARY_FIELDS)
+    for name, folder in zip(names, args.input):
+        runs = []
+        for trace in sorted(f for f in os.listdir(folder) if f.endswith(".trace")):
+            run = summarize_run(os.path.join(folder, trace), args.window)
+            runs.append(run)
+            if runs_writer is not None:
+                runs_writer.writerow([name, trace[:-len(".trace")], *run])
+        writer.writerow(summarize_configuration(name, runs, args.limit * 1024, args.near))
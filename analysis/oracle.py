@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+"""Lazy lookups in oracle files (lines of the form `<query>, <answer>`, e.g. `single-oracle`).
+
+The oracle file is memory mapped and never parsed in its entirety. Lookups use binary search
+over an index of line offsets sorted by query name, which is stored next to the oracle file
+(`<oracle>.idx`) and only rebuilt when the oracle file changes. As when the file was read into
+a dict, the last line of a query takes precedence over earlier lines of the same query: the index
+is sorted stably, so such lines keep their order in the file, and lookups take the last of them.
+"""
+
+from array import array as _array
+import mmap as _mmap
+import os as _os
+import struct as _struct
+from typing import Dict, List, Optional
+
+INDEX_SUFFIX = ".idx"
+
+_INDEX_MAGIC = b"ORACLEI1"
+# Magic, index typecode, size and modification time of the oracle file, and number of entries.
+_INDEX_HEADER = "<8scQQQ"
+
+
+class OracleFile:
+    """Lookups in a single oracle file."""
+
+    def __init__(self, path: str, write_index=True):
+        self.path = path
+        self._cache: Dict[str, Optional[str]] = {}
+        with open(path, "rb") as file:
+            stat = _os.fstat(file.fileno())
+            self._mmap = _mmap.mmap(file.fileno(), 0, access=_mmap.ACCESS_READ) if stat.st_size > 0 else b""
+        self._offsets = self._load_index(stat)
+        if self._offsets is None:
+            self._offsets = self._build_index(stat)
+            if write_index:
+                self._write_index(stat)
+
+    def _key(self, offset: int) -> bytes:
+        end = self._mmap.find(b",", offset)
+        return self._mmap[offset:end].strip()
+
+    def _value(self, offset: int) -> str:
+        start = self._mmap.find(b",", offset) + 1
+        end = self._mmap.find(b"\n", start)
+        return self._mmap[start:end if end != -1 else len(self._mmap)].strip().decode()
+
+    def _build_index(self, stat):
+        offsets = []
+        pos = 0
+        size = len(self._mmap)
+        while pos < size:
+            end = self._mmap.find(b"\n", pos)
+            if end == -1:
+                end = size
+            if self._mmap.find(b",", pos, end) != -1:
+                offsets.append(pos)
+            pos = end + 1
+        offsets.sort(key=self._key)
+        return _array("I" if stat.st_size < 2 ** 32 else "Q", offsets)
+
+    def _load_index(self, stat):
+        try:
+            with open(self.path + INDEX_SUFFIX, "rb") as file:
+                header = file.read(_struct.calcsize(_INDEX_HEADER))
+                magic, typecode, size, mtime, n = _struct.unpack(_INDEX_HEADER, header)
+                if magic != _INDEX_MAGIC or size != stat.st_size or mtime != stat.st_mtime_ns:
+                    return None
+                offsets = _array(typecode.decode())
+                offsets.fromfile(file, n)
+                return offsets
+        except (OSError, EOFError, _struct.error):
+            return None
+
+    def _write_index(self, stat):
+        try:
+            write_index(self.path + INDEX_SUFFIX, self._offsets, stat)
+        except OSError:
+            pass
+
+    def _find(self, query: str) -> Optional[str]:
+        key = query.strip().encode()
+        lo, hi = 0, len(self._offsets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key < self._key(self._offsets[mid]):
+                hi = mid
+            else:
+                lo = mid + 1
+        # lo is past the last line of the query, if any
+        if lo > 0 and self._key(self._offsets[lo - 1]) == key:
+            return self._value(self._offsets[lo - 1])
+        return None
+
+    def get(self, query: str, default=None) -> Optional[str]:
+        if query not in self._cache:
+            self._cache[query] = self._find(query)
+        answer = self._cache[query]
+        return default if answer is None else answer
+
+    def __contains__(self, query: str) -> bool:
+        return self.get(query) is not None
+
+    def __getitem__(self, query: str) -> str:
+        answer = self.get(query)
+        if answer is None:
+            raise KeyError(query)
+        return answer
+
+    def __len__(self):
+        return len(self._offsets)
+
+
+def write_index(path: str, offsets, stat):
+    """Write an index of the oracle file with the given stat result, offsets must be sorted stably by query name."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as file:
+        file.write(_struct.pack(_INDEX_HEADER, _INDEX_MAGIC, offsets.typecode.encode(),
+                                stat.st_size, stat.st_mtime_ns, len(offsets)))
+        offsets.tofile(file)
+    _os.replace(tmp, path)
+
+
+class Oracle:
+    """Lookups in several oracle files (e.g. for different years). Earlier files take precedence."""
+
+    def __init__(self, paths: List[str]):
+        self.files = [OracleFile(path) for path in paths]
+
+    @classmethod
+    def from_files(cls, files: List[OracleFile]) -> "Oracle":
+        """An oracle of already opened oracle files."""
+        oracle = cls([])
+        oracle.files = files
+        return oracle
+
+    def get(self, query: str, default=None) -> Optional[str]:
+        for file in self.files:
+            answer = file.get(query)
+            if answer is not None:
+                return answer
+        return default
+
+    def __contains__(self, query: str) -> bool:
+        return self.get(query) is not None
+
+    def __getitem__(self, query: str) -> str:
+        answer = self.get(query)
+        if answer is None:
+            raise KeyError(query)
+        return answer
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+"""Parser for the output files of a single verifypn run.
+
+The answer line (FORMULA ... TECHNIQUES) and the @@@time,memory@@@ trailer written by
+`/usr/bin/time -f` are always near the end of the output, so instead of matching a
+`.*`-prefixed regex from the start of the file, the file is searched backwards from the end.
+Only files lacking some of the lines are scanned in their entirety.
+"""
+
+from collections import namedtuple as _namedtuple
+import mmap as _mmap
+import os as _os
+import re as _re
+
+# Files up to this size are read directly, larger files are memory mapped so that only their tail is read.
+TAIL_SIZE = 64 * 1024
+
+# The reference regexes, matched against the entire file contents. Used by parse_legacy.
+regex = r".*FORMULA ([\S]*) ([\S]*) TECHNIQUES .*@@@([^,]*),([^@]*)@@@"
+stats_regex = r".*FORMULA [\S]* STATS EXPLORED (\d+)"
+
+_formula_re = _re.compile(rb"FORMULA (\S*) (\S*) TECHNIQUES ")
+_trailer_re = _re.compile(rb"@@@([^,]*),([^@]*)@@@")
+_stats_re = _re.compile(rb"FORMULA \S* STATS EXPLORED (\d+)")
+
+Result = _namedtuple("Result", ["query", "answer", "time", "memory", "states"])
+
+
+def _last_match(pattern, buf, needle, end):
+    """Find the match of pattern starting at the last occurrence of needle before end."""
+    pos = buf.rfind(needle, 0, end)
+    while pos != -1:
+        match = pattern.match(buf, pos)
+        if match:
+            return match
+        pos = buf.rfind(needle, 0, pos)
+    return None
+
+
+def parse_buffer(buf):
+    """Parse the contents of an output file given as a bytes-like object. Returns None if there is no answer."""
+    trailer = _last_match(_trailer_re, buf, b"@@@", len(buf))
+    if trailer is None:
+        return None
+    # The answer line must end before the trailer starts.
+    pos = buf.rfind(b"FORMULA ", 0, trailer.start())
+    formula = None
+    while pos != -1:
+        match = _formula_re.match(buf, pos)
+        if match and match.end() <= trailer.start():
+            formula = match
+            break
+        pos = buf.rfind(b"FORMULA ", 0, pos)
+    if formula is None:
+        return None
+    stats = _last_match(_stats_re, buf, b"FORMULA ", len(buf))
+    return Result(*(group.decode(errors="replace") for group in formula.groups() + trailer.groups()),
+                  states=stats.group(1).decode() if stats else "-1")
+
+
+def parse_legacy(contents):
+    """Parse the contents of an output file given as a string using the reference regexes."""
+    match = _re.match(regex, contents, _re.DOTALL)
+    if not match:
+        return None
+    stats = _re.match(stats_regex, contents, _re.DOTALL)
+    return Result(*match.groups(), states=stats.group(1) if stats else "-1")
+
+
+class OutputFile:
+    """Read-only view of an output file that avoids reading more than the tail of large files.
+
+    Use as a context manager; `buffer` is a bytes-like object with the file contents.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.buffer = b""
+        self._file = None
+        self._mmap = None
+
+    def __enter__(self):
+        self._file = open(self.path, "rb")
+        size = _os.fstat(self._file.fileno()).st_size
+        if size > TAIL_SIZE:
+            self._mmap = _mmap.mmap(self._file.fileno(), 0, access=_mmap.ACCESS_READ)
+            self.buffer = self._mmap
+        elif size > 0:
+            self.buffer = self._file.read()
+        return self
+
+    def __exit__(self, *exc):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+        return False
+
+
+def parse_file(path):
+    """Parse the output file at path. Returns None if there is no answer."""
+    with OutputFile(path) as output:
+        return parse_buffer(output.buffer)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+"""Simulation of the portfolio in scripts/*/tapaal.sh on the results of individual configurations.
+
+The results of each configuration (e.g. csv/dist-heur.csv) are taken as the time the corresponding
+strategy needs to answer each query. A schedule (the budget fractions of the steps, the strategies
+of each step and the number of cores) is replayed on all models at once: the queries of a model
+are visited in order, as in tapaal.sh, while every step is evaluated on the arrays of all models.
+
+The simplification step (step 0) is not replayed, as there are no per-query results of it. Its
+budget is charged in full, and the queries it answers can be given as lists of queries (e.g. the
+`simplified` and `immediate-solve` files). Steps 1, 2 and 4 run their strategies in parallel, so at
+most `cores` of them are used and the CPU time of a query is its wall time times the number of
+strategies. Depends on NumPy.
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from common import Dataset, load_input
+from matrix import ResultMatrix
+
+# The budget of tapaal.sh given BK_TIME_CONFINEMENT=3600.
+TOTAL = 3590
+QUERIES_PER_MODEL = 16
+# Steps whose answers are counted separately.
+STEPS = (0, 1, 2, 4)
+# The number of rounds of step 4 in tapaal.sh.
+RANDOM_ROUNDS = 21
+
+# Budgets are fractions of the total time: the simplification step (TIMEOUT_SIMP), the timeout of
+# step 1 (TIMEOUT_PAR) and the minimum timeout of step 2 (TIMEOUT_SEQ_MIN). A fraction of None uses
+# the fraction of the examination in tapaal.sh.
+Schedule = namedtuple("Schedule", ["simp", "par", "seq", "cores", "par_strategies", "seq_strategies", "rand_strategies"])
+
+# The fractions of the LTLCardinality and LTLFireability branches of `case "$BK_EXAMINATION"` in tapaal.sh.
+DEFAULT_FRACTIONS = {
+    "LTLC": {"simp": 1 / 5, "par": 1 / 12, "seq": 1 / 7},
+    "LTLF": {"simp": 1 / 5, "par": 1 / 12, "seq": 1 / 6},
+}
+
+
+class Portfolio:
+    """The times of the strategies on all queries, grouped by model and examination.
+
+    `times` is a strategies × models × queries array with infinity for unanswered queries, and
+    `presolved` a models × queries mask of the queries answered by the simplification step.
+    """
+
+    def __init__(self, names: List[str], models: List[str], times, presolved):
+        self.names = names
+        self.models = models
+        self.times = times
+        self.presolved = presolved
+        self._best = {}
+
+    @classmethod
+    def from_datasets(cls, datasets: Dict[str, Dataset], presolved: Iterable[str] = (),
+                      queries_per_model=QUERIES_PER_MODEL) -> "Portfolio":
+        """Group the queries <model>-<index>-<category> of the datasets by model and category."""
+        matrix = ResultMatrix.from_datasets(datasets)
+        groups = {}
+        columns = np.empty((2, len(matrix.queries)), dtype=np.int64)
+        for i, query in enumerate(matrix.queries):
+            model, index, category = query.rsplit("-", 2)
+            columns[0, i] = groups.setdefault(f"{model}-{category}", len(groups))
+            columns[1, i] = int(index)
+        if len(matrix.queries) > 0 and columns[1].max() >= queries_per_model:
+            raise RuntimeError(f"Query index {columns[1].max()} exceeds the {queries_per_model} queries per model")
+
+        times = np.full((len(matrix.names), len(groups), queries_per_model), np.inf)
+        times[:, columns[0], columns[1]] = np.where(matrix.solved, matrix.time, np.inf)
+        mask = np.zeros((len(groups), queries_per_model), dtype=bool)
+        presolved = matrix.query_mask(presolved)
+        mask[columns[0, presolved], columns[1, presolved]] = True
+        return cls(matrix.names, list(groups), times, mask)
+
+    def best(self, strategies) -> np.ndarray:
+        """The time of the fastest of the strategies on each query (the time of running them in parallel)."""
+        key = tuple(strategies)
+        if key not in self._best:
+            if len(key) == 0:
+                self._best[key] = np.full(self.presolved.shape, np.inf)
+            else:
+                self._best[key] = self.times[[self.names.index(s) for s in key]].min(axis=0)
+        return self._best[key]
+
+    def fraction(self, schedule: Schedule, step: str) -> np.ndarray:
+        """The budget fraction of a step ("simp", "par" or "seq") for each model, by default that of its examination."""
+        value = getattr(schedule, step)
+        if value is not None:
+            return np.full(len(self.models), value)
+        return np.array([DEFAULT_FRACTIONS[model.rpartition("-")[2]][step] for model in self.models])
+
+    def simulate(self, schedule: Schedule, total=TOTAL) -> dict:
+        """Replay the schedule. Returns the number of answers per step, the total and the CPU time."""
+        solved = self.presolved.copy()
+        answers = {0: int(solved.sum())}
+        left = total * (1 - self.fraction(schedule, "simp"))
+        cpu = np.zeros(len(self.models))
+
+        def run(times, q, timeout, active, n):
+            """Run n strategies on query q of the active models, returning the models that answered it."""
+            nonlocal left
+            found = active & (times[:, q] <= timeout)
+            elapsed = np.where(found, times[:, q], timeout) * active
+            left = left - elapsed
+            cpu[:] += elapsed * n
+            solved[:, q] |= found
+            return found
+
+        # Step 1: every query with the parallel strategies for TIMEOUT_PAR seconds
+        par = schedule.par_strategies[:schedule.cores]
+        times = self.best(par)
+        before = solved.sum()
+        par_timeout = total * self.fraction(schedule, "par")
+        for q in range(solved.shape[1]):
+            run(times, q, np.minimum(par_timeout, left), ~solved[:, q] & (left > 0), len(par))
+        answers[1] = int(solved.sum() - before)
+
+        # Step 2: the remaining queries with the sequential strategies, sharing the remaining time
+        seq = schedule.seq_strategies[:schedule.cores]
+        times = self.best(seq)
+        before = solved.sum()
+        remaining = (~solved).sum(axis=1)
+        stopped = np.zeros(len(self.models), dtype=bool)
+        seq_timeout = total * self.fraction(schedule, "seq")
+        if (seq_timeout > 0).any():
+            for q in range(solved.shape[1]):
+                pending = ~solved[:, q] & ~stopped & (seq_timeout > 0)
+                timeout = np.maximum(left // np.maximum(remaining, 1), seq_timeout)
+                stopped |= pending & (timeout > left)
+                active = pending & ~stopped & (left > 0)
+                run(times, q, timeout, active, len(seq))
+                remaining = remaining - active
+        answers[2] = int(solved.sum() - before)
+
+        # Step 4: rounds of the random strategies, sharing the remaining time between the remaining queries
+        rand = schedule.rand_strategies[:schedule.cores]
+        times = self.best(rand)
+        before = solved.sum()
+        if len(rand) > 0:
+            for _ in range(RANDOM_ROUNDS):
+                timeout = left // np.maximum((~solved).sum(axis=1), 1)
+                if not ((~solved).any(axis=1) & (timeout > 0)).any():
+                    break
+                for q in range(solved.shape[1]):
+                    run(times, q, np.minimum(timeout, left), ~solved[:, q] & (np.minimum(timeout, left) > 0), len(rand))
+        answers[4] = int(solved.sum() - before)
+
+        return {
+            **{f"step{step}": answers[step] for step in STEPS},
+            "solved": int(solved.sum()),
+            "cpu": float(cpu.sum()),
+        }
+
+
+def schedules(fractions: Dict[str, List[Optional[float]]], cores: List[int], par: List[str], seq: List[str],
+              rand: List[str], fixed=False) -> Iterable[Schedule]:
+    """All combinations of the budget fractions, core counts and subsets of at most `cores` parallel and sequential strategies.
+
+    With fixed, the strategies are used as given (in order) instead of searching their subsets.
+    """
+    def subsets(pool, n):
+        if fixed or len(pool) == 0:
+            return [tuple(pool)]
+        return [s for k in range(1, min(n, len(pool)) + 1) for s in itertools.combinations(pool, k)]
+
+    for simp, p, s, n in itertools.product(fractions["simp"], fractions["par"], fractions["seq"], cores):
+        for par_strategies, seq_strategies in itertools.product(subsets(par, n), subsets(seq, n)):
+            yield Schedule(simp, p, s, n, par_strategies, seq_strategies, tuple(rand))
+
+
+def _format_fraction(value: Optional[float]) -> str:
+    return "tapaal.sh" if value is None else f"{value:.4f}"
+
+
+def _read_queries(paths: Optional[List[str]]) -> set:
+    queries = set()
+    for path in paths or ():
+        with open(path) as file:
+            queries.update(q.strip() for q in file if q.strip())
+    return queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="This utility simulates the portfolio of tapaal.sh on the results of individual configurations, either for a single schedule or a grid of schedules given by several values of the options. The fractions are of the total time.")
+    parser.add_argument("-i", "--input", nargs="+", required=True, help="Result CSVs of the configurations, or <database>:<configuration>.")
+    parser.add_argument("-n", "--names", nargs="+", help="Names of the configurations used by --par, --seq and --rand. Defaults to the file names without extension.")
+    parser.add_argument("--par", nargs="+", default=[], help="Strategies of step 1 (parallel processing).")
+    parser.add_argument("--seq", nargs="+", default=[], help="Strategies of step 2 (sequential processing).")
+    parser.add_argument("--rand", nargs="+", default=[], help="Strategies of step 4 (random parallel processing). Defaults to none, skipping the step.")
+    parser.add_argument("--fixed", action="store_true", help="Use the --par and --seq strategies as given instead of searching all subsets of at most --cores of them.")
+    parser.add_argument("-c", "--cores", nargs="+", type=int, default=[4], help="Number of cores, the maximum number of strategies run in parallel. Defaults to 4.")
+    parser.add_argument("--simp-fraction", nargs="+", type=float, default=[None], help="Budget of the simplification step. Defaults to 1/5 as in tapaal.sh.")
+    parser.add_argument("--par-fraction", nargs="+", type=float, default=[None], help="Timeout of each query in step 1. Defaults to 1/12 as in tapaal.sh.")
+    parser.add_argument("--seq-fraction", nargs="+", type=float, default=[None], help="Minimum timeout of each query in step 2. Defaults to 1/7 for LTLCardinality and 1/6 for LTLFireability as in tapaal.sh.")
+    parser.add_argument("-T", "--total", type=float, default=TOTAL, help=f"Total time per model and examination in seconds. Defaults to {TOTAL}.")
+    parser.add_argument("-s", "--simplified", nargs="+", help="Files listing the queries answered by the simplification step, e.g. simplified immediate-solve.")
+    parser.add_argument("-o", "--output", help="Write the results of all schedules to this CSV file.")
+    parser.add_argument("--top", type=int, default=10, help="Number of best schedules to print. Defaults to 10.")
+
+    args = parser.parse_args()
+
+    names = args.names or [os.path.splitext(os.path.basename(path))[0] if ":" not in path else path.rpartition(":")[2]
+                           for path in args.input]
+    if len(names) != len(args.input):
+        print("Error: Mismatching number of inputs and names", file=sys.stderr)
+        sys.exit(1)
+    for strategy in args.par + args.seq + args.rand:
+        if strategy not in names:
+            print(f"Error: Unknown strategy {strategy}", file=sys.stderr)
+            sys.exit(1)
+
+    portfolio = Portfolio.from_datasets({name: load_input(path) for name, path in zip(names, args.input)},
+                                        _read_queries(args.simplified))
+    fractions = {"simp": args.simp_fraction, "par": args.par_fraction, "seq": args.seq_fraction}
+    results = [(schedule, portfolio.simulate(schedule, args.total))
+               for schedule in schedules(fractions, args.cores, args.par, args.seq, args.rand, args.fixed)]
+    # Most answers first, then least CPU time.
+    results.sort(key=lambda r: (-r[1]["solved"], r[1]["cpu"]))
+
+    fields = ["simp", "par", "seq", "cores", "par_strategies", "seq_strategies", "rand_strategies",
+              *(f"step{step}" for step in STEPS), "solved", "cpu"]
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            writer = csv.writer(file, lineterminator="\n")
+            writer.writerow(fields)
+            for schedule, result in results:
+                writer.writerow([*("tapaal.sh" if f is None else f for f in schedule[:3]), schedule.cores, *(" ".join(s) for s in schedule[4:]), *result.values()])
+
+    print(f"Simulated {len(results)} schedules on {len(portfolio.models)} models.")
+    for schedule, result in results[:args.top]:
+        steps = ", ".join(f"step {step}: {result['step' + str(step)]}" for step in STEPS)
+        print(f"{result['solved']} answers ({steps}), "
+              f"{result['cpu'] / 3600:.1f} CPU hours: simp {_format_fraction(schedule.simp)} par {_format_fraction(schedule.par)} seq {_format_fraction(schedule.seq)} "
+              f"cores {schedule.cores} par [{' '.join(schedule.par_strategies)}] seq [{' '.join(schedule.seq_strategies)}]")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+"""Dense integer IDs of the MCC queries and sets of queries as bitsets.
+
+Every query <model>-<NN>-<category> gets the ID 32 * m + 16 * c + NN, where m is the number of the
+model (in the order the models are first seen) and c the index of the category in CATEGORIES, so
+the queries of a model occupy one block of 32 bits. A QuerySet stores its queries as the bits of a
+Python int, so unions, intersections and differences of query lists (exclude, simplified, weak
+lists, solved sets) are word-parallel operations. All sets share the module's UNIVERSE by default.
+"""
+
+from typing import Dict, Iterable, Iterator, List
+
+from common import CATEGORIES
+
+QUERIES_PER_MODEL = 16
+BLOCK = QUERIES_PER_MODEL * len(CATEGORIES)
+_CATEGORY_CODES = {category: c for c, category in enumerate(CATEGORIES)}
+
+# The query lists of the answers obtained by query simplification.
+SIMPLIFICATION_SETS = ("simplified", "immediate-solve")
+
+
+class QueryUniverse:
+    """The mapping between query names and IDs.
+
+    Names that are not of the form <model>-<NN>-<category> get a block of their own.
+    """
+
+    def __init__(self):
+        self.models: List[str] = []
+        self._model_ids: Dict[str, int] = {}
+        self._ids: Dict[str, int] = {}
+        self._others: Dict[int, str] = {}
+
+    def __len__(self):
+        """The number of IDs in use (including the unused IDs of the blocks)."""
+        return len(self.models) * BLOCK
+
+    def id(self, name: str) -> int:
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids[name] = self._intern(name)
+        return i
+
+    def ids(self, names: Iterable[str]) -> List[int]:
+        return [self.id(name) for name in names]
+
+    def find(self, name: str) -> int:
+        """The ID of name, or -1 if it has not been seen, without adding it to the universe."""
+        i = self._ids.get(name)
+        if i is None:
+            i = self._intern(name, add=False)
+        return i
+
+    def _intern(self, name: str, add=True) -> int:
+        parts = name.rsplit("-", 2)
+        category = _CATEGORY_CODES.get(parts[-1]) if len(parts) == 3 else None
+        if category is not None and len(parts[1]) == 2 and parts[1].isdigit() and int(parts[1]) < QUERIES_PER_MODEL:
+            model = parts[0]
+            block = self._model_ids.get(model)
+            if block is None:
+                if not add:
+                    return -1
+                block = self._model_ids[model] = len(self.models)
+                self.models.append(model)
+            return block * BLOCK + category * QUERIES_PER_MODEL + int(parts[1])
+        if not add:
+            return -1
+        self.models.append("")
+        i = (len(self.models) - 1) * BLOCK
+        self._others[i] = name
+        return i
+
+    def name(self, i: int) -> str:
+        if i in self._others:
+            return self._others[i]
+        category, index = divmod(i % BLOCK, QUERIES_PER_MODEL)
+        return f"{self.models[i // BLOCK]}-{index:02d}-{CATEGORIES[category]}"
+
+
+UNIVERSE = QueryUniverse()
+
+
+class QuerySet:
+    """An immutable set of queries of a universe, stored as the bits of an int."""
+
+    __slots__ = ("bits", "universe", "_bytes")
+
+    def __init__(self, bits: int = 0, universe: QueryUniverse = UNIVERSE):
+        self.bits = bits
+        self.universe = universe
+        self._bytes = None
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int], universe: QueryUniverse = UNIVERSE) -> "QuerySet":
+        ids = list(ids)
+        buf = bytearray(max(ids, default=-1) // 8 + 1)
+        for i in ids:
+            buf[i >> 3] |= 1 << (i & 7)
+        return cls(int.from_bytes(buf, "little"), universe)
+
+    @classmethod
+    def from_names(cls, names: Iterable[str], universe: QueryUniverse = UNIVERSE) -> "QuerySet":
+        return cls.from_ids(map(universe.id, names), universe)
+
+    def _buffer(self) -> bytes:
+        if self._bytes is None:
+            self._bytes = self.bits.to_bytes((self.bits.bit_length() + 7) // 8, "little")
+        return self._bytes
+
+    def contains_id(self, i: int) -> bool:
+        buf = self._buffer()
+        return 0 <= (i >> 3) < len(buf) and bool(buf[i >> 3] >> (i & 7) & 1)
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and self.contains_id(self.universe.find(name))
+
+    def ids(self) -> Iterator[int]:
+        """The IDs in the set in increasing order."""
+        for byte, value in enumerate(self._buffer()):
+            while value:
+                low = value & -value
+                yield byte * 8 + low.bit_length() - 1
+                value ^= low
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.universe.name, self.ids())
+
+    def __len__(self):
+        return bin(self.bits).count("1")
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def _check(self, other):
+        if not isinstance(other, QuerySet):
+            return NotImplemented
+        if other.universe is not self.universe:
+            raise RuntimeError("Query sets of different universes")
+        return other
+
+    def __or__(self, other):
+        other = self._check(other)
+        return other if other is NotImplemented else QuerySet(self.bits | other.bits, self.universe)
+
+    def __and__(self, other):
+        other = self._check(other)
+        return other if other is NotImplemented else QuerySet(self.bits & other.bits, self.universe)
+
+    def __sub__(self, other):
+        other = self._check(other)
+        return other if other is NotImplemented else QuerySet(self.bits & ~other.bits, self.universe)
+
+    def __xor__(self, other):
+        other = self._check(other)
+        return other if other is NotImplemented else QuerySet(self.bits ^ other.bits, self.universe)
+
+    def __eq__(self, other):
+        return isinstance(other, QuerySet) and other.universe is self.universe and other.bits == self.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def mask(self, ids):
+        """Boolean NumPy array telling for each of the IDs whether it is in the set."""
+        import numpy as np
+        ids = np.asarray(ids, dtype=np.int64)
+        bits = np.unpackbits(np.frombuffer(self._buffer(), dtype=np.uint8), bitorder="little")
+        known = ids < len(bits)
+        mask = np.zeros(len(ids), dtype=bool)
+        mask[known] = bits[ids[known]].astype(bool)
+        return mask
+
+
+def query_set(names: Iterable[str]) -> QuerySet:
+    return QuerySet.from_names(names)
+
+
+def read_query_set(*paths: str) -> QuerySet:
+    """The union of the query lists (one query per line) in the files, e.g. exclude or simplified."""
+    queries = QuerySet()
+    for path in paths:
+        with open(path) as f:
+            queries |= query_set(q.strip() for q in f if q.strip())
+    return queries
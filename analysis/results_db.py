@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+"""SQLite store of the results of all configurations.
+
+The database has a table `results` with a row per (configuration, query) and indexes on the
+configuration, query and model, and a table `query_sets` of named sets of queries (e.g. the
+`exclude`, `simplified` and `immediate-solve` files). Datasets are loaded from it using
+common.load_input with inputs of the form `<database>:<configuration>`, which leaves the excluded
+queries and slow answers out in the query, and the scripts read the query lists of such inputs
+from the query sets.
+"""
+
+import argparse
+import contextlib
+import sqlite3
+import sys
+from typing import Iterable, List, Optional
+
+from common import CATEGORIES, Dataset, import_csv
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    configuration TEXT NOT NULL,
+    query TEXT NOT NULL,
+    model TEXT NOT NULL,
+    category TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    time REAL NOT NULL,
+    memory REAL NOT NULL,
+    states INTEGER NOT NULL,
+    PRIMARY KEY (configuration, query)
+);
+CREATE INDEX IF NOT EXISTS results_query ON results (query);
+CREATE INDEX IF NOT EXISTS results_model ON results (model);
+CREATE TABLE IF NOT EXISTS query_sets (
+    name TEXT NOT NULL,
+    query TEXT NOT NULL,
+    PRIMARY KEY (name, query)
+);
+"""
+
+SUFFIXES = (".db", ".sqlite")
+
+
+def model_of(query: str) -> str:
+    """The model of a query name of the form <model>-<n>-<category>."""
+    return query.rsplit("-", 2)[0]
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def ingest_dataset(conn: sqlite3.Connection, configuration: str, data: Dataset):
+    """Replace the results of configuration with the rows of data."""
+    with conn:
+        conn.execute("DELETE FROM results WHERE configuration = ?", (configuration,))
+        conn.executemany(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((configuration, row.query, model_of(row.query), CATEGORIES[c] if c >= 0 else "",
+              row.answer, row.time, row.memory, row.states)
+             for row, c in zip(data.values(), data.category)),
+        )
+
+
+def ingest_query_set(conn: sqlite3.Connection, name: str, queries: Iterable[str]):
+    """Replace the query set name with queries."""
+    with conn:
+        conn.execute("DELETE FROM query_sets WHERE name = ?", (name,))
+        conn.executemany("INSERT OR IGNORE INTO query_sets VALUES (?, ?)", ((name, q) for q in queries))
+
+
+def configurations(conn: sqlite3.Connection) -> List[str]:
+    return [c for c, in conn.execute("SELECT DISTINCT configuration FROM results ORDER BY configuration")]
+
+
+def query_set(conn: sqlite3.Connection, name: str) -> set:
+    return {q for q, in conn.execute("SELECT query FROM query_sets WHERE name = ?", (name,))}
+
+
+def _where(configuration: str, exclude_sets: Iterable[str], max_time: Optional[float]):
+    clauses = ["r.configuration = ?"]
+    params: list = [configuration]
+    exclude_sets = list(exclude_sets)
+    if exclude_sets:
+        clauses.append("NOT EXISTS (SELECT 1 FROM query_sets s WHERE s.query = r.query AND s.name IN ({}))"
+                       .format(", ".join("?" * len(exclude_sets))))
+        params += exclude_sets
+    if max_time is not None:
+        clauses.append("r.time <= ?")
+        params.append(max_time)
+    return " AND ".join(clauses), params
+
+
+def load_dataset(conn: sqlite3.Connection, configuration: str, exclude_sets: Iterable[str] = (),
+                 max_time: Optional[float] = None) -> Dataset:
+    """The results of configuration, except queries in the named query sets and answers slower than max_time."""
+    where, params = _where(configuration, exclude_sets, max_time)
+    return Dataset.from_rows(conn.execute(
+        f"SELECT query, answer, time, memory, states FROM results r WHERE {where} ORDER BY query", params))
+
+
+def count_answers(conn: sqlite3.Connection, configuration: str, exclude_sets: Iterable[str] = (),
+                  max_time: Optional[float] = None) -> dict:
+    """The number of answers of configuration per (category, answer)."""
+    where, params = _where(configuration, exclude_sets, max_time)
+    return {(category, answer): n for category, answer, n in conn.execute(
+        f"SELECT category, answer, COUNT(*) FROM results r WHERE {where} GROUP BY category, answer", params)}
+
+
+def trivial_queries(conn: sqlite3.Connection, configurations: Optional[Iterable[str]] = None) -> List[str]:
+    """Queries answered without exploring any states by all configurations, or without state statistics by any (see trivial-answers.py).
+
+    Only the given configurations are considered, by default all of them.
+    """
+    where, params = "", []
+    if configurations is not None:
+        params = list(configurations)
+        where = "WHERE configuration IN ({})".format(", ".join("?" * len(params)))
+    return [q for q, in conn.execute(
+        f"SELECT query FROM results {where} GROUP BY query HAVING MIN(states) = -1 OR SUM(states) = 0 ORDER BY query",
+        params)]
+
+
+def is_database_input(spec: str) -> bool:
+    path = spec.rpartition(":")[0]
+    return path.endswith(SUFFIXES)
+
+
+@contextlib.contextmanager
+def open_input(spec: str):
+    """The connection to the database of an input <database>:<configuration> and the configuration."""
+    path, _, configuration = spec.rpartition(":")
+    conn = connect(path)
+    try:
+        yield conn, configuration
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="This utility imports result CSVs and query lists into a results database.")
+    parser.add_argument("database", help="The database file, e.g. results.db. Created if it does not exist.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    csv_parser = subparsers.add_parser("import-csv", help="Import (replace) the results of a configuration from a CSV file.")
+    csv_parser.add_argument("configuration")
+    csv_parser.add_argument("csv", type=argparse.FileType("r"))
+    set_parser = subparsers.add_parser("import-set", help="Import (replace) a named list of queries, e.g. exclude.")
+    set_parser.add_argument("name")
+    set_parser.add_argument("file", type=argparse.FileType("r"))
+    subparsers.add_parser("list", help="List the configurations in the database.")
+
+    args = parser.parse_args()
+    conn = connect(args.database)
+    if args.command == "import-csv":
+        ingest_dataset(conn, args.configuration, import_csv(args.csv))
+    elif args.command == "import-set":
+        ingest_query_set(conn, args.name, (q.strip() for q in args.file if q.strip()))
+    else:
+        for configuration in configurations(conn):
+            print(configuration)
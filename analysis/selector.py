@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""Selection of output files by their names, before they are opened.
+
+The output files written by run_job_array.sh are named MODEL.QUERY.EXAMINATION, where MODEL is
+<family>-<PT|COL>-<instance> (e.g. ARMCacheCoherence-PT-none), QUERY is 1 to 16 and EXAMINATION is
+LTLCardinality or LTLFireability. The files are indexed by these parts so that a selection of
+families, models, queries and examinations only reads the files it matches.
+"""
+
+import fnmatch
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+OutputKey = namedtuple("OutputKey", ["family", "kind", "instance", "query", "examination"])
+
+EXAMINATIONS = ("LTLCardinality", "LTLFireability")
+
+
+def parse_name(name: str) -> Optional[OutputKey]:
+    """The key of an output file name, or None if it is not of the form MODEL.QUERY.EXAMINATION."""
+    model, query, examination = (name.rsplit(".", 2) + ["", ""])[:3]
+    if examination not in EXAMINATIONS or not query.isdigit():
+        return None
+    family, _, rest = model.partition("-")
+    kind, _, instance = rest.partition("-")
+    return OutputKey(family, kind, instance, int(query), examination)
+
+
+def model_name(key: OutputKey) -> str:
+    return "-".join(part for part in (key.family, key.kind, key.instance) if part)
+
+
+def parse_ranges(ranges: str) -> set:
+    """The numbers in a list of ranges such as 1-4,7."""
+    numbers = set()
+    for part in ranges.split(","):
+        first, _, last = part.strip().partition("-")
+        numbers.update(range(int(first), int(last or first) + 1))
+    return numbers
+
+
+class Selector:
+    """A selection of output files. Each given condition must hold; families and models are glob patterns."""
+
+    def __init__(self, families: Optional[List[str]] = None, models: Optional[List[str]] = None,
+                 queries: Optional[Iterable[int]] = None, examinations: Optional[List[str]] = None):
+        self.families = families
+        self.models = models
+        self.queries = set(queries) if queries is not None else None
+        # Examinations may be abbreviated, e.g. LTLC.
+        self.examinations = ({e for e in EXAMINATIONS for prefix in examinations if e.startswith(prefix)}
+                             if examinations is not None else None)
+
+    def matches(self, key: Optional[OutputKey]) -> bool:
+        if key is None:
+            return False
+        if self.families is not None and not any(fnmatch.fnmatchcase(key.family, p) for p in self.families):
+            return False
+        if self.models is not None and not any(fnmatch.fnmatchcase(model_name(key), p) for p in self.models):
+            return False
+        if self.queries is not None and key.query not in self.queries:
+            return False
+        return self.examinations is None or key.examination in self.examinations
+
+    def matches_name(self, name: str) -> bool:
+        return self.matches(parse_name(name))
+
+
+def index_output_files(files: Iterable[Tuple]) -> Dict[OutputKey, Tuple]:
+    """Index (name, ...) tuples, e.g. from to_csv.scan_folder, by the key of the name. Files with other names are left out."""
+    index = {}
+    for entry in files:
+        key = parse_name(entry[0])
+        if key is not None:
+            index[key] = entry
+    return index
+
+
+def select(index: Dict[OutputKey, Tuple], selector: Selector) -> List[Tuple]:
+    """The entries of the index matching the selector, sorted by name."""
+    return sorted(entry for key, entry in index.items() if selector.matches(key))
+
+
+def add_arguments(parser):
+    parser.add_argument("--family", nargs="+", help="Only read the output files of these model families (glob patterns, e.g. 'Philosophers*').")
+    parser.add_argument("--model", nargs="+", help="Only read the output files of these models (glob patterns, e.g. 'BART-COL-*').")
+    parser.add_argument("--queries", help="Only read the output files of these query numbers (1-16), e.g. 1-4,7.")
+    parser.add_argument("--examination", nargs="+", help="Only read the output files of these examinations (LTLCardinality or LTLFireability, may be abbreviated to LTLC and LTLF).")
+
+
+def from_arguments(args) -> Optional[Selector]:
+    """The selector given by the arguments added by add_arguments, or None if they select everything."""
+    if args.family is None and args.model is None and args.queries is None and args.examination is None:
+        return None
+    return Selector(args.family, args.model, parse_ranges(args.queries) if args.queries is not None else None, args.examination)
@@ -4,95 +4,111 @@ import os
 import sys
 import argparse
 import csv
+from multiprocessing import Pool
 
-NUM_QUERIES = 2032 * 16
+import results_db
+from common import import_csv, load_input
+from oracle import Oracle
+from queries import QuerySet
+from stats import compute_statistics, csv_row, database_statistics, load_exclude, print_statistics, write_report
 
-def calc_correct(input_list, oracle):
-    return len(list(filter(lambda x: x[0] in oracle and x[1] == oracle[x[0]], input_list)))
+_oracle = None
+_exclude = None
+_no_query = False
+_upper = None
+
+def _init_worker(oracle_paths, exclude, no_query, upper):
+    global _oracle, _exclude, _no_query, _upper
+    _oracle = Oracle(oracle_paths)
+    _exclude = exclude
+    _no_query = no_query
+    _upper = upper
+
+
+def _statistics(name, path, oracle, exclude, no_query, upper):
+    """The statistics of an input. A results database leaves out and counts the skipped answers itself."""
+    if results_db.is_database_input(path):
+        return database_statistics(name, path, oracle, no_query, upper)
+    return compute_statistics(name, load_input(path), oracle, exclude, upper)
 
-def compare_results(input_list, oracle):
-    good = []
-    bad = []
-    for f in input_list:
-        if f[0] not in oracle:
-            continue
-        if f[1] == oracle[f[0]]:
-            good.append(f)
-        else:
-            bad.append(f)
-    return good, bad
 
-def calc_answers_not_in_oracle(input_list, oracle):
-    return len(list(filter(lambda x: x[0] not in oracle, input_list)))
+def _batch_statistics(job):
+    name, path = job
+    return _statistics(name, path, _oracle, _exclude, _no_query, _upper)
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("This utility creates statistics about a run_sc run.")
-    parser.add_argument("-o", "--oracle", help="File containing the oracle answers. Defaults to single-oracle", default="single-oracle")
-    parser.add_argument("-i", "--input", help="The input file. If omitted stdin is used.")
+    parser.add_argument("-o", "--oracle", nargs="+", help="Files containing the oracle answers, earlier files take precedence. Defaults to single-oracle", default=["single-oracle"])
+    parser.add_argument("-i", "--input", help="The input file, or <database>:<configuration> for results in a results database. If omitted stdin is used.")
+    parser.add_argument("-b", "--batch", nargs="+", help="Compute statistics for each of these input files in parallel instead of a single input.")
+    parser.add_argument("-n", "--names", nargs="+", help="Names of the batch inputs. Defaults to the file names without extension.")
+    parser.add_argument("-r", "--report", help="With --batch, also write the statistics of all inputs to this file, as JSON if it ends with .json and CSV otherwise.")
+    parser.add_argument("-j", "--jobs", help="Number of worker processes used with --batch. Defaults to the number of CPUs.", type=int)
     parser.add_argument("-m", "--print-mismatch", help="Print list of queries with answers inconsistent with oracle", type=argparse.FileType('w'))
     parser.add_argument("-u", "--upper", help="Consider only answers obtained within specified duration (in minutes)", type=float)
     parser.add_argument("--no-query", help="Exclude answers obtained directly from query simplification", action='store_true')
+    parser.add_argument("-d", "--daemon", help="Compute the statistics in the analysis daemon listening on this socket (see daemon.py) instead.")
 
     args = parser.parse_args()
 
-
-    try:
-        oracle = {}
-        with open(args.oracle, 'r') as oracle_file:
-            oracle_reader = csv.reader(oracle_file)
-            for row in oracle_reader:
-                oracle[row[0]] = row[1].strip()
-    except IOError:
-        print(f"Unable to open the file {args.oracle}", file=sys.stderr)
-        raise
-
-    if args.input is not None:
-        input_file = open(args.input, 'r')
+    names = None
+    if args.batch is not None:
+        names = args.names or [os.path.splitext(os.path.basename(path))[0] if ":" not in path else path.rpartition(":")[2]
+                               for path in args.batch]
+        if len(names) != len(args.batch):
+            print("Error: Mismatching number of inputs and names", file=sys.stderr)
+            sys.exit(1)
+
+    if args.daemon is not None:
+        import daemon
+        if args.batch is None and args.input is None:
+            print("Error: An input must be given with --daemon", file=sys.stderr)
+            sys.exit(1)
+        results = daemon.request(args.daemon, {"op": "stats", "inputs": args.batch or [args.input], "names": names or [args.input],
+                                               "oracle": args.oracle, "no_query": args.no_query, "upper": args.upper})
+        results = [(result["stats"], result["mismatch"]) for result in results]
     else:
-        input_file = sys.stdin
-
-    exclude = set()
-    if args.no_query:
-        with open("simplified") as f:
-            exclude = set(q.strip() for q in f.readlines())
-        with open("immediate-solve") as f:
-            exclude = exclude.union(set(q.strip() for q in f.readlines()))
-
-
-    n_skipped = 0
-    n_skipped_qred = 0
-    input_reader = csv.reader(input_file)
-    def use_row(row):
-        global n_skipped
-        global n_skipped_qred
-        if row[0].strip() in exclude:
-            n_skipped += 1
-            n_skipped_qred += 1
-            return False
-        if args.upper is None or args.upper >= float(row[2]) / 60:
-            return True
-        n_skipped += 1
-        return False
-
-    input_list = list(filter(use_row, input_reader))
-
-    good, bad = compare_results(input_list, oracle)
-    num_correct = len(good)
-    num_answered = len(input_list)
-    num_not_in_oracle = calc_answers_not_in_oracle(input_list, oracle)
-
-    if args.print_mismatch is not None:
-        writer = csv.writer(args.print_mismatch)
-        for row in bad:
-            writer.writerow(row)
-
-    print(f"Number of queries: {NUM_QUERIES}")
-    print(f"Number of answers not in oracle: {num_not_in_oracle}")
-    print(f"Number of answered queries of all queries: {num_answered}/{NUM_QUERIES}")
-    print(f"Percentage answered: {(num_answered/(NUM_QUERIES))*100}%")
-
-    print(f"Number of correct of answered: {num_correct}/{num_answered-num_not_in_oracle}")
-    print(f"Percentage correct of answered: {(num_correct/(num_answered-num_not_in_oracle))*100}%")
-    if n_skipped > 0:
-        print(f"Number of answers from query simplification: {n_skipped_qred}")
-        print(f"Total queries answered: {num_answered + n_skipped}")
+        exclude = QuerySet()
+        if args.no_query and not all(path is not None and results_db.is_database_input(path)
+                                     for path in args.batch or [args.input]):
+            exclude = load_exclude()
+
+        # Also builds the oracle indices before any batch workers open them.
+        try:
+            oracle = Oracle(args.oracle)
+        except IOError as e:
+            print(f"Unable to open the file {e.filename}", file=sys.stderr)
+            raise
+
+        if args.batch is None:
+            if args.input is not None:
+                results = [_statistics(args.input, args.input, oracle, exclude, args.no_query, args.upper)]
+            else:
+                results = [compute_statistics(args.input, import_csv(sys.stdin), oracle, exclude, args.upper)]
+        else:
+            with Pool(args.jobs, initializer=_init_worker, initargs=(args.oracle, exclude, args.no_query, args.upper)) as pool:
+                results = pool.map(_batch_statistics, zip(names, args.batch))
+        results = [(stats, [csv_row(row) for row in bad]) for stats, bad in results]
+
+    if args.batch is None:
+        stats, bad = results[0]
+        if args.print_mismatch is not None:
+            csv.writer(args.print_mismatch).writerows(bad)
+        print_statistics(stats)
+        sys.exit(0)
+
+    statistics = []
+    for i, (stats, bad) in enumerate(results):
+        if i > 0:
+            print()
+        print(f"== {stats['name']} ==")
+        print_statistics(stats)
+        statistics.append(stats)
+        if args.print_mismatch is not None:
+            writer = csv.writer(args.print_mismatch)
+            for row in bad:
+                writer.writerow([stats["name"], *row])
+
+    if args.report is not None:
+        write_report(args.report, statistics)
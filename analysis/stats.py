@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""Statistics of the answers of a configuration checked against the oracle, see stats-generator.py."""
+
+import csv
+import json
+
+from queries import SIMPLIFICATION_SETS, read_query_set
+
+NUM_QUERIES = 2032 * 16
+
+def calc_correct(input_list, oracle):
+    return len(list(filter(lambda x: x[0] in oracle and x[1] == oracle[x[0]], input_list)))
+
+def compare_results(input_list, oracle):
+    good = []
+    bad = []
+    for f in input_list:
+        if f[0] not in oracle:
+            continue
+        if f[1] == oracle[f[0]]:
+            good.append(f)
+        else:
+            bad.append(f)
+    return good, bad
+
+def calc_answers_not_in_oracle(input_list, oracle):
+    return len(list(filter(lambda x: x[0] not in oracle, input_list)))
+
+
+def csv_row(row):
+    """The row as written by to_csv.py."""
+    return [row.query, row.answer, row.time, int(row.memory) if row.memory.is_integer() else row.memory, row.states]
+
+
+def load_exclude():
+    return read_query_set(*SIMPLIFICATION_SETS)
+
+
+def compute_statistics(name, data, oracle, exclude, upper):
+    """Compute the statistics of a dataset. Returns a dict of the statistics and the list of mismatching rows."""
+    selected = data.select(exclude=exclude)
+    n_skipped_qred = len(data) - len(selected)
+    if upper is not None:
+        selected = [i for i in selected if upper >= data.time[i] / 60]
+    n_skipped = len(data) - len(selected)
+
+    input_list = [data.row(i) for i in selected]
+    good, bad = compare_results(input_list, oracle)
+    num_answered = len(input_list)
+    return {
+        "name": name,
+        "queries": NUM_QUERIES,
+        "answered": num_answered,
+        "not_in_oracle": calc_answers_not_in_oracle(input_list, oracle),
+        "correct": len(good),
+        "incorrect": len(bad),
+        "skipped": n_skipped,
+        "skipped_query_simplification": n_skipped_qred,
+    }, bad
+
+
+def database_statistics(name, spec, oracle, no_query, upper):
+    """compute_statistics of a <database>:<configuration> input, whose answers are left out and counted by the database."""
+    import results_db
+    exclude_sets = SIMPLIFICATION_SETS if no_query else ()
+    with results_db.open_input(spec) as (conn, configuration):
+        total = sum(results_db.count_answers(conn, configuration).values())
+        kept = sum(results_db.count_answers(conn, configuration, exclude_sets).values()) if no_query else total
+        data = results_db.load_dataset(conn, configuration, exclude_sets, upper * 60 if upper is not None else None)
+    stats, bad = compute_statistics(name, data, oracle, None, None)
+    stats["skipped"] = total - len(data)
+    stats["skipped_query_simplification"] = total - kept
+    return stats, bad
+
+
+def print_statistics(stats):
+    num_answered = stats["answered"]
+    num_checked = num_answered - stats["not_in_oracle"]
+    print(f"Number of queries: {stats['queries']}")
+    print(f"Number of answers not in oracle: {stats['not_in_oracle']}")
+    print(f"Number of answered queries of all queries: {num_answered}/{stats['queries']}")
+    print(f"Percentage answered: {(num_answered/(stats['queries']))*100}%")
+
+    print(f"Number of correct of answered: {stats['correct']}/{num_checked}")
+    if num_checked > 0:
+        print(f"Percentage correct of answered: {(stats['correct']/num_checked)*100}%")
+    if stats["skipped"] > 0:
+        print(f"Number of answers from query simplification: {stats['skipped_query_simplification']}")
+        print(f"Total queries answered: {num_answered + stats['skipped']}")
+
+
+def write_report(fname, statistics):
+    """Write the statistics of all configurations as JSON if fname ends with .json, otherwise as CSV."""
+    with open(fname, "w") as file:
+        if fname.endswith(".json"):
+            json.dump(statistics, file, indent=2)
+            print(file=file)
+        else:
+            writer = csv.DictWriter(file, fieldnames=list(statistics[0].keys()))
+            writer.writeheader()
+            writer.writerows(statistics)
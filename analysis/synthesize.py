@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+"""Synthetic verifypn output folders and result CSVs for benchmarking the analysis scripts.
+
+The queries are those of single-oracle (the MCC2020 models, 16 queries each for LTLCardinality and
+LTLFireability). At a scale above 1 the models are repeated with a suffix on their instance
+(e.g. AirplaneLD-COL-0010x2), below 1 only a prefix of the models is used. Each query gets a
+difficulty, and each configuration a speed, so that the configurations answer mostly the same
+queries with correlated times like real ones. The output files are written like by
+run_job_array.sh: a verbose log, the answer line (preceded by the STATS EXPLORED line for most
+answers), and the @@@time,memory@@@ trailer. A timed out run has no trailer, and a crashed run has
+a trailer but no answer, so neither gives a row. The CSVs contain the rows to_csv.py would output.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from collections import namedtuple
+from statistics import NormalDist
+
+Parameters = namedtuple("Parameters", ["timeout", "log_lines", "timeout_ratio", "non_match_ratio",
+                                       "simplified_ratio", "stats_ratio"])
+DEFAULT_PARAMETERS = Parameters(timeout=900, log_lines=200, timeout_ratio=0.2, non_match_ratio=0.03,
+                                simplified_ratio=0.15, stats_ratio=0.9)
+
+EXAMINATIONS = {"LTLC": "LTLCardinality", "LTLF": "LTLFireability"}
+TECHNIQUES = "SEQUENTIAL_PROCESSING EXPLICIT LTL NDFS"
+SIMPLIFICATION_TECHNIQUES = "COLLATERAL_PROCESSING STRUCTURAL_REDUCTION QUERY_REDUCTION SAT_SMT"
+LOG_LINES = [
+    "Size of net before structural reductions: 1234 places, 5678 transitions",
+    "Structural reduction finished after 0.0123 seconds",
+    "Net reduction is enabled.",
+    "Removed transitions: 42",
+    "Removed places: 17",
+    "Applications of rule A: 3",
+    "Applications of rule B: 11",
+    "Query size reduced from 57 to 23 nodes ( 59.65 percent reduction).",
+    "Query after reduction: (A (G (E (F (\"Intersection.pos_0\" <= 3)))))",
+    "Checking LTL property using the Tarjan algorithm",
+]
+
+
+def oracle_queries(path="single-oracle"):
+    """The query names of the oracle with their answers, in file order."""
+    queries = []
+    with open(path) as file:
+        for line in file:
+            name, _, answer = line.partition(",")
+            if name.strip():
+                queries.append((name.strip(), answer.strip()))
+    return queries
+
+
+def scale_queries(queries, scale):
+    """The queries of scale times as many models, see the module documentation."""
+    models = list(dict.fromkeys(name.rsplit("-", 2)[0] for name, _ in queries))
+    count = max(1, round(scale * len(models)))
+    selected = {model: copy for copy in range(math.ceil(count / len(models)))
+                for model in models[:count - copy * len(models)]}
+    scaled = []
+    for copy in range(max(selected.values()) + 1):
+        suffix = f"x{copy + 1}" if copy else ""
+        for name, answer in queries:
+            model, index, category = name.rsplit("-", 2)
+            if selected.get(model, -1) >= copy:
+                scaled.append((f"{model}{suffix}-{index}-{category}", answer))
+    return scaled
+
+
+def _log(rng, lines):
+    return "".join(LOG_LINES[rng.randrange(len(LOG_LINES))] + "\n" for _ in range(lines))
+
+
+def synthesize(queries, configuration, seed, params=DEFAULT_PARAMETERS, folder=None, csv_file=None):
+    """Write the output files of a configuration to folder and/or its rows to csv_file. Returns the number of rows.
+
+    The difficulty of a query only depends on the seed, so configurations with the same seed are comparable.
+    """
+    speed = random.Random(f"{seed}:{configuration}").lognormvariate(0, 0.5)
+    rng = random.Random(f"{seed}:{configuration}:runs")
+    # The times are log-normal with the median chosen such that about timeout_ratio of the runs time out.
+    sigma = 2.5
+    mu = math.log(params.timeout) - NormalDist().inv_cdf(1 - params.timeout_ratio) * sigma
+    rows = 0
+    for name, answer in queries:
+        difficulty = random.Random(f"{seed}:{name}")
+        time = difficulty.lognormvariate(mu, sigma) * speed * rng.lognormvariate(0, 0.3)
+        simplified = difficulty.random() < params.simplified_ratio
+        outcome = rng.random()
+        if simplified:
+            time = min(time, 0.05 + rng.random())
+        lines = int(rng.lognormvariate(math.log(max(params.log_lines, 1)), 1)) if params.log_lines else 0
+        memory = int(rng.lognormvariate(11, 1.5))
+        states = int(time * rng.lognormvariate(11, 1)) if not simplified and rng.random() < params.stats_ratio else -1
+        model, index, category = name.rsplit("-", 2)
+        answered = outcome >= params.non_match_ratio and time < params.timeout
+        if answered and csv_file is not None:
+            print(f"{model}-{index}-{category},{answer},{time:.2f},{memory},{states}", file=csv_file)
+        rows += answered
+        if folder is None:
+            continue
+        with open(os.path.join(folder, f"{model}.{int(index) + 1}.{EXAMINATIONS[category]}"), "w") as file:
+            if time >= params.timeout:
+                file.write(_log(rng, lines))
+                continue
+            file.write(_log(rng, lines // 2))
+            if outcome < params.non_match_ratio:
+                file.write(f"Command terminated by signal 9\n@@@{time:.2f},{memory}@@@\n")
+                continue
+            if states >= 0:
+                file.write(f"FORMULA {model}-{index} STATS EXPLORED {states}\n")
+            file.write(_log(rng, lines - lines // 2))
+            file.write(f"FORMULA {model}-{index} {answer} TECHNIQUES "
+                       f"{SIMPLIFICATION_TECHNIQUES if simplified else TECHNIQUES}\n")
+            file.write(f"@@@{time:.2f},{memory}@@@\n")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="This utility writes synthetic output folders and result CSVs of configurations, with the queries of an oracle.")
+    parser.add_argument("configurations", nargs="+", help="Names of the configurations. Configurations with the same seed answer comparable queries.")
+    parser.add_argument("-s", "--scale", type=float, default=1, help="Number of models relative to the oracle. Defaults to 1.")
+    parser.add_argument("--oracle", default="single-oracle", help="The oracle whose queries and answers are used. Defaults to single-oracle.")
+    parser.add_argument("--seed", default="0", help="Seed of the random generator. Defaults to 0.")
+    parser.add_argument("-o", "--output", help="Write the output files of each configuration to a folder of its name in this folder.")
+    parser.add_argument("-c", "--csv", help="Write the CSV of each configuration to <configuration>.csv in this folder.")
+    parser.add_argument("-t", "--timeout", type=float, default=DEFAULT_PARAMETERS.timeout, help=f"Timeout in seconds. Defaults to {DEFAULT_PARAMETERS.timeout}.")
+    parser.add_argument("--log-lines", type=int, default=DEFAULT_PARAMETERS.log_lines, help=f"Median number of verbose log lines per output file. Defaults to {DEFAULT_PARAMETERS.log_lines}.")
+    parser.add_argument("--timeout-ratio", type=float, default=DEFAULT_PARAMETERS.timeout_ratio, help=f"Approximate fraction of timed out runs. Defaults to {DEFAULT_PARAMETERS.timeout_ratio}.")
+    parser.add_argument("--non-match-ratio", type=float, default=DEFAULT_PARAMETERS.non_match_ratio, help=f"Fraction of crashed runs. Defaults to {DEFAULT_PARAMETERS.non_match_ratio}.")
+    parser.add_argument("--simplified-ratio", type=float, default=DEFAULT_PARAMETERS.simplified_ratio, help=f"Fraction of queries answered by query simplification. Defaults to {DEFAULT_PARAMETERS.simplified_ratio}.")
+    parser.add_argument("--stats-ratio", type=float, default=DEFAULT_PARAMETERS.stats_ratio, help=f"Fraction of the other answers with a STATS EXPLORED line. Defaults to {DEFAULT_PARAMETERS.stats_ratio}.")
+
+    args = parser.parse_args()
+
+    if args.output is None and args.csv is None:
+        print("Nothing to write, give -o and/or -c")
+        sys.exit(1)
+
+    params = Parameters(args.timeout, args.log_lines, args.timeout_ratio, args.non_match_ratio,
+                        args.simplified_ratio, args.stats_ratio)
+    queries = scale_queries(oracle_queries(args.oracle), args.scale)
+    for configuration in args.configurations:
+        folder = None
+        if args.output is not None:
+            folder = os.path.join(args.output, configuration)
+            os.makedirs(folder, exist_ok=True)
+        if args.csv is not None:
+            os.makedirs(args.csv, exist_ok=True)
+        with open(os.path.join(args.csv, f"{configuration}.csv"), "w") if args.csv is not None else open(os.devnull, "w") as csv_file:
+            rows = synthesize(queries, configuration, args.seed, params, folder, csv_file)
+        print(f"{configuration}: {rows} of {len(queries)} queries answered", file=sys.stderr)
@@ -1,66 +1,234 @@
 #!/usr/bin/python3
 import os
 import argparse
-import re
+import json
 import sys
+from multiprocessing import Pool
+
+import archives
+import output_parser
+import selector
+from common import Dataset, write_sidecar
 
-regex = r".*FORMULA ([\S]*) ([\S]*) TECHNIQUES .*@@@([^,]*),([^@]*)@@@"
-stats_regex = r".*FORMULA [\S]* STATS EXPLORED (\d+)"
 query_red_str = "COLLATERAL_PROCESSING STRUCTURAL_REDUCTION QUERY_REDUCTION"
 
+
+def is_output_file(name):
+    return name.endswith("LTLCardinality") or name.endswith("LTLFireability")
+
+
+def scan_folder(folder):
+    """Scan folder once using os.scandir.
+
+    Returns the total number of files and a list of (name, size, mtime) of the LTL output files sorted by name.
+    """
+    num_files = 0
+    output_files = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            num_files += 1
+            if is_output_file(entry.name):
+                stat = entry.stat()
+                output_files.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    output_files.sort()
+    return num_files, output_files
+
+
+def load_manifest(path, folder, filter_str):
+    """Load the cached rows from the manifest at path, ignoring it if it was made for another folder or filter."""
+    try:
+        with open(path) as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return {}
+    if manifest.get("folder") != os.path.abspath(folder) or manifest.get("filter") != filter_str:
+        return {}
+    return manifest["files"]
+
+
+def write_manifest(path, folder, filter_str, files):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as file:
+        json.dump({"folder": os.path.abspath(folder), "filter": filter_str, "files": files}, file)
+    os.replace(tmp, path)
+
+
+def to_row(result, output_file):
+    return ','.join([f"{result.query}-{output_file[output_file.rfind('LTL'):][:4]}", result.answer, result.time, result.memory, result.states])
+
+
+def parse_output(output_file, buf, filter_str, keep_non_match, check):
+    """Parse the contents of a single output file.
+
+    Returns a tuple (output_file, row, non_match, mismatch) where row is the CSV line, or None if the file
+    did not match, and non_match is the file contents if it did not match and these were requested.
+    If check is set, mismatch describes any difference from the reference regexes (otherwise None).
+    """
+    if len(buf) == 0:
+        return output_file, None, None, None
+    if filter_str and buf.find(filter_str.encode()) == -1:
+        return output_file, None, None, None
+    result = output_parser.parse_buffer(buf)
+    mismatch = None
+    if check:
+        expected = output_parser.parse_legacy(bytes(buf).decode(errors="replace"))
+        if expected != result:
+            mismatch = f"{output_file}: expected {expected}, got {result}"
+    if result is not None:
+        return output_file, to_row(result, output_file), None, mismatch
+    return output_file, None, bytes(buf).decode(errors="replace") if keep_non_match else None, mismatch
+
+
+def parse_output_file(job):
+    """Parse a single output file in a folder, see parse_output."""
+    folder, output_file, filter_str, keep_non_match, check = job
+    try:
+        with output_parser.OutputFile(os.path.join(folder, output_file)) as output:
+            return parse_output(output_file, output.buffer, filter_str, keep_non_match, check)
+    except IOError:
+        print(f"Unable to open {output_file}.", file=sys.stderr)
+        return output_file, None, None, None
+
+
+def parse_archive_member(job):
+    """Parse the contents of an output file read from an archive, see parse_output."""
+    return parse_output(*job)
+
+
+def archive_jobs(path, member_dir, members, is_selected, is_cached, filter_str, keep_non_match, check):
+    """The parse jobs of the selected output files in the archive that are not cached.
+
+    (name, size, mtime) of every file in the archive is appended to members, which is complete once the jobs are exhausted.
+    """
+    for name, size, mtime, contents in archives.iter_members(path, member_dir, read=is_selected):
+        members.append((name, size, mtime))
+        if contents is not None and not is_cached(name, size, mtime):
+            yield name, contents, filter_str, keep_non_match, check
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("This utility translates the output of a run_sc output folder into a csv containing the data.")
-    parser.add_argument("folder", help="Path to the folder containing the output files.")
+    parser.add_argument("folder", help="Path to the folder containing the output files, or an archive (.tar, .tar.gz, .tar.zst, .zip) containing them.")
+    parser.add_argument("--member-dir", help="With an archive, the folder in the archive containing the output files, e.g. output/mcc2020/foo. Defaults to all files in the archive, which fails if files of the same name are in several folders.")
     parser.add_argument("--non_match", help="A file to dump the contents of the non matching files to. Can be used to determine inputs that error.")
     parser.add_argument("--count_queries", help="A file to dump the total number of queries to.")
     parser.add_argument("--filter", help="Include only query files containing given string.")
     parser.add_argument("--progress", help="Print progress to stderr", action='store_true')
-    
+    parser.add_argument("--check", help="Also parse every file using the reference regexes and report any difference to stderr. Exits with status 2 if there are differences.", action='store_true')
+    parser.add_argument("--manifest", help="Cache of the parsed rows, e.g. csv/foo.csv.manifest. Only files that are new or changed (size or modification time) since the manifest was written are parsed; it is updated afterwards.")
+    parser.add_argument("--binary", help="Also write the rows to this binary file, which is loaded instead of the CSV by the other scripts when it is newer. Should be named after the CSV file with the suffix .bin, e.g. csv/foo.csv.bin.")
+    parser.add_argument("--db", help="Also import the rows into this results database (see results_db.py), replacing the previous results of the configuration.")
+    parser.add_argument("--configuration", help="Name of the configuration in the results database. Defaults to the name of the folder.")
+    parser.add_argument("-j", "--jobs", help="Number of worker processes used for parsing. Defaults to 1. Rows are output in the same (sorted) order regardless.", type=int, default=1)
+    selector.add_arguments(parser)
+
     args = parser.parse_args()
 
-    if not os.path.isdir(args.folder):
-        print(f"{args.folder} is not a directory", file=sys.stderr)
+    archive = archives.is_archive(args.folder)
+    if not archive and not os.path.isdir(args.folder):
+        print(f"{args.folder} is not a directory or an archive", file=sys.stderr)
         exit(1)
+    # The folder the rows are taken from, used for the manifest and as the default configuration name.
+    source = os.path.join(args.folder, args.member_dir) if archive and args.member_dir else args.folder
+    selection = selector.from_arguments(args)
+
+    def _is_selected(name):
+        return is_output_file(name) and (selection is None or selection.matches_name(name))
 
     if args.non_match is not None:
         non_match = open(args.non_match, 'w')
     else:
         non_match = None
 
+    cached = {}
+    if args.manifest is not None and not args.check:
+        cached = load_manifest(args.manifest, source, args.filter)
+
+    def _is_cached(name, size, mtime):
+        entry = cached.get(name)
+        # The contents of non-matching files are not cached, so these are parsed again if they are requested.
+        return (entry is not None and entry[0] == size and entry[1] == mtime
+                and (entry[2] is not None or non_match is None))
+
+    if archive:
+        members = []
+        jobs = archive_jobs(args.folder, args.member_dir, members, _is_selected, _is_cached, args.filter, non_match is not None, args.check)
+        parse = parse_archive_member
+    else:
+        num_files, output_files = scan_folder(args.folder)
+        if selection is not None:
+            output_files = selector.select(selector.index_output_files(output_files), selection)
+        jobs = ((args.folder, name, args.filter, non_match is not None, args.check)
+                for name, size, mtime in output_files if not _is_cached(name, size, mtime))
+        parse = parse_output_file
+    pool = Pool(args.jobs) if args.jobs > 1 else None
+    if pool is not None:
+        # imap keeps the input order while workers run ahead, so rows can be streamed as they arrive.
+        # For archives, the members are decompressed by this process while the workers parse them.
+        results = pool.imap(parse, jobs, chunksize=64)
+    else:
+        results = map(parse, jobs)
+
+    if archive:
+        # The members are in archive order, so the rows are output in sorted order once the archive has been read.
+        parsed = {result[0]: result for result in results}
+        num_files = len(members)
+        output_files = sorted(member for member in members if _is_selected(member[0]))
+        results = (parsed[name] for name, size, mtime in output_files if not _is_cached(name, size, mtime))
+
     if args.count_queries is not None:
         with open(args.count_queries, "w") as file:
-            print(len(os.listdir(args.folder)), file=file)
-
+            print(num_files, file=file)
 
-    num_files=len(os.listdir(args.folder))
-    for i, output_file in enumerate(os.listdir(args.folder)):
+    dataset = Dataset() if args.binary is not None or args.db is not None else None
+    n_mismatches = 0
+    n_parsed = 0
+    # Files outside the selection keep their cached rows.
+    manifest = dict(cached) if selection is not None else {}
+    for i, (name, size, mtime) in enumerate(output_files):
         if args.progress and (i % 1000) == 0:
-            print(f"{i}/{num_files}", file=sys.stderr)
-        if not (output_file.endswith("LTLCardinality") or output_file.endswith("LTLFireability")):
-                continue
-        try:
-            with open(os.path.join(args.folder, output_file), 'r') as file:
-                try:
-                    file_contents = file.read()
-                except UnicodeDecodeError:
-                    print(f"error reading file {output_file}")
-                    raise
-                if file_contents == "":
-                    continue
-                match = re.match(regex, file_contents, re.DOTALL)
-                stats = re.match(stats_regex, file_contents, re.DOTALL)
-                if args.filter and args.filter not in file_contents:
-                    continue
-                if match:
-                    groups = list(match.groups())
-                    if stats:
-                        groups.append(stats.group(1))
-                    else:
-                        groups.append("-1")
-                    print(','.join([f"{groups[0]}-{output_file[output_file.rfind('LTL'):][:4]}"] + groups[1:])) 
-                elif non_match is not None:
-                    print(output_file, file=non_match)
-                    print(file_contents, file=non_match)
-
-        except IOError:
-            print(f"Unable to open {output_file}.", file=sys.stderr)
+            print(f"{i}/{len(output_files)}", file=sys.stderr)
+        if _is_cached(name, size, mtime):
+            row, contents, mismatch = cached[name][2], None, None
+        else:
+            _, row, contents, mismatch = next(results)
+            n_parsed += 1
+        manifest[name] = [size, mtime, row]
+        if mismatch is not None:
+            n_mismatches += 1
+            print(mismatch, file=sys.stderr)
+        if row is not None:
+            print(row)
+            if dataset is not None:
+                query, answer, time, memory, states = row.split(",")
+                dataset.append(query, answer, float(time), float(memory), int(states))
+        elif contents is not None:
+            print(name, file=non_match)
+            print(contents, file=non_match)
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    if args.binary is not None:
+        # The sidecar must be newer than the CSV the output is redirected to.
+        sys.stdout.flush()
+        write_sidecar(dataset, args.binary)
+
+    if args.db is not None:
+        import results_db
+        conn = results_db.connect(args.db)
+        results_db.ingest_dataset(conn, args.configuration or os.path.basename(os.path.normpath(source)), dataset)
+        conn.close()
+
+    if args.manifest is not None:
+        write_manifest(args.manifest, source, args.filter, manifest)
+        if args.progress:
+            print(f"Parsed {n_parsed} new or changed files", file=sys.stderr)
+
+    if args.check:
+        print(f"{n_mismatches} files differ from the reference regexes", file=sys.stderr)
+        if n_mismatches > 0:
+            exit(2)
@@ -1,29 +1,48 @@
 #!/usr/bin/env python3
 
 import argparse
+import sys
 
-from common import import_csv
+import results_db
+from common import load_input
 from glob import glob
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument("inputs", nargs='+', help="Input range for computing trivial instances. Should include all experiments to ensure consistency.")
+    parser.add_argument("inputs", nargs='*', help="Input range for computing trivial instances. Should include all experiments to ensure consistency.")
+    parser.add_argument("--db", help="Compute the trivial instances over all configurations in this results database instead.")
+    parser.add_argument("--store", help="With --db or the inputs of a single results database, also store the trivial instances in the database as a query set with this name (e.g. exclude).")
 
     args = parser.parse_args()
 
+    # Configurations of a single results database are compared by the database.
+    configurations = None
+    databases = {spec.rpartition(":")[0] for spec in args.inputs}
+    if args.db is None and len(databases) == 1 and all(results_db.is_database_input(spec) for spec in args.inputs):
+        args.db = databases.pop()
+        configurations = [spec.rpartition(":")[2] for spec in args.inputs]
+
+    if args.db is not None:
+        conn = results_db.connect(args.db)
+        bad = results_db.trivial_queries(conn, configurations)
+        if args.store is not None:
+            results_db.ingest_query_set(conn, args.store, bad)
+        for q in bad:
+            print(q)
+        sys.exit(0)
+
     bad = set()
     nstates = {}
     for fname in args.inputs:
-        with open(fname) as f:
-            rows = import_csv(f)
-            for q, row in rows.items():
-                if row.states == -1:
-                    bad.add(q)
-                elif q in nstates:
-                    nstates[q] += row.states
-                else:
-                    nstates[q] = row.states
+        data = load_input(fname)
+        for q, states in zip(data.queries, data.states):
+            if states == -1:
+                bad.add(q)
+            elif q in nstates:
+                nstates[q] += states
+            else:
+                nstates[q] = states
 
     bad |= set(q for q, n in nstates.items() if n == 0)
 
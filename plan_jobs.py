@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+
+"""Submit an experiment to SLURM as array tasks packed by predicted runtime.
+
+Takes the same options as run_job.sh. The runtime of every (model, query, examination) is predicted
+from the result CSVs of earlier configurations (a query unanswered by a configuration counts as the
+timeout), and the jobs are packed longest first into array tasks whose predicted runtime stays
+within a target makespan. Each task gets a time limit of its predicted runtime times a slack
+factor, rounded up to a time class, and one array is submitted per time class. Models not in any
+of the CSVs keep the layout of run_job_array.sh: a task per model and examination with 17 hours.
+
+The tasks are run by run_job_packed.sh, which reads its jobs from a plan file (a line of
+MODEL:QUERY:EXAMINATION jobs per task) and skips jobs whose output already exists, so tasks that
+exceed their limit can simply be submitted again.
+"""
+
+import argparse
+import csv
+import heapq
+import math
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+EXAMINATIONS = ["LTLCardinality", "LTLFireability"]
+N_QUERIES = 16
+# Time limits (in minutes) that tasks are rounded up to, the last being the flat limit of run_job_array.sh.
+TIME_CLASSES = [15, 30, 60, 120, 240, 480, 1020]
+# Seconds added per job for starting the verifier and parsing the model.
+OVERHEAD = 10
+
+
+def load_predictions(paths, timeout, quantile):
+    """The predicted runtime in seconds of each (model, query, examination) answered in any of the CSVs."""
+    times = defaultdict(list)
+    for path in paths:
+        with open(path) as file:
+            for row in csv.reader(file):
+                if len(row) < 3:
+                    continue
+                model, index, category = row[0].rsplit("-", 2)
+                examination = next((t for t in EXAMINATIONS if t.startswith(category)), None)
+                if examination is not None:
+                    times[(model, int(index) + 1, examination)].append(min(float(row[2]), timeout))
+    predictions = {}
+    for job, values in times.items():
+        # Configurations that did not answer the query ran until the timeout.
+        values = sorted(values + [timeout] * (len(paths) - len(values)))
+        predictions[job] = values[min(len(values) - 1, int(quantile * len(values)))]
+    return predictions
+
+
+def pack(jobs, capacity):
+    """Pack (seconds, job) pairs longest first, each into the least loaded task if it fits there, otherwise into a new task."""
+    tasks = []
+    heap = []
+    for seconds, job in sorted(jobs, key=lambda j: -j[0]):
+        if heap and heap[0][0] + seconds <= capacity:
+            load, i = heapq.heappop(heap)
+        else:
+            load, i = 0, len(tasks)
+            tasks.append([])
+        tasks[i].append(job)
+        heapq.heappush(heap, (load + seconds, i))
+    return tasks
+
+
+def time_class(seconds):
+    minutes = math.ceil(seconds / 60)
+    return next((c for c in TIME_CLASSES if c >= minutes), 60 * math.ceil(minutes / 60))
+
+
+def make_plan(models, predictions, timeout, makespan, slack):
+    """Returns a dict of time limit (minutes) to the list of tasks, each a list of (model, query, examination)."""
+    seen = {job[0] for job in predictions}
+    jobs = []
+    plan = defaultdict(list)
+    for model in models:
+        for t in EXAMINATIONS:
+            if model not in seen:
+                plan[TIME_CLASSES[-1]].append([(model, query, t) for query in range(1, N_QUERIES + 1)])
+                continue
+            for query in range(1, N_QUERIES + 1):
+                jobs.append((slack * predictions.get((model, query, t), timeout) + OVERHEAD, (model, query, t)))
+
+    predicted = dict((job, seconds) for seconds, job in jobs)
+    for task in pack(jobs, makespan):
+        # A task never needs more than all of its jobs timing out.
+        worst = len(task) * (timeout + OVERHEAD)
+        plan[time_class(min(sum(predicted[job] for job in task), worst))].append(task)
+    return plan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Submits an experiment to SLURM as array tasks packed by the runtimes predicted from earlier results. Note that arguments starting with a dash must be given as -r=\"...\".")
+    parser.add_argument("-t", "--timeout", type=int, default=15, help="Timeout per query in minutes. Defaults to 15.")
+    parser.add_argument("-n", "--name", default="", help="Name of the experiment, used as output folder.")
+    parser.add_argument("-p", "--partition", required=True, help="SLURM partition.")
+    parser.add_argument("-a", "--algorithm", default="tarjan", help="LTL algorithm. Defaults to tarjan.")
+    parser.add_argument("-r", "--arguments", default="", help="Additional arguments to the binary.")
+    parser.add_argument("-m", "--memory", type=int, default=16, help="Memory limit per query in GiB. Defaults to 16.")
+    parser.add_argument("-c", "--csv", nargs="+", required=True, help="Result CSVs of earlier configurations used to predict the runtimes.")
+    parser.add_argument("--quantile", type=float, default=1.0, help="The quantile of the runtimes of the earlier configurations used as prediction. Defaults to 1 (the slowest).")
+    parser.add_argument("--makespan", type=float, default=4, help="Target predicted runtime of a task in hours. Defaults to 4.")
+    parser.add_argument("--slack", type=float, default=1.5, help="Factor applied to the predicted runtimes. Defaults to 1.5.")
+    parser.add_argument("--dry-run", action="store_true", help="Write the plan files and print the sbatch commands without submitting them.")
+    parser.add_argument("binary", help="Binary in sequential-bin.")
+    parser.add_argument("folder", help="Folder of models, e.g. mcc2020.")
+
+    args = parser.parse_args()
+
+    folder = os.path.basename(os.path.normpath(args.folder))
+    if not os.path.isfile(f"sequential-bin/{args.binary}"):
+        print(f"{args.binary} is not a file")
+        sys.exit(1)
+    if not os.path.isdir(folder):
+        print(f"{folder} is not a folder")
+        sys.exit(1)
+
+    timeout = args.timeout * 60
+    predictions = load_predictions(args.csv, timeout, args.quantile)
+    plan = make_plan(sorted(os.listdir(folder)), predictions, timeout, args.makespan * 3600, args.slack)
+
+    odir = os.path.join("output", folder, args.name)
+    pdir = os.path.join("slurm-plans", folder, args.name)
+    os.makedirs(odir, exist_ok=True)
+    os.makedirs(pdir, exist_ok=True)
+    os.makedirs("slurm-dump", exist_ok=True)
+    for stale in os.listdir(pdir):
+        if stale.endswith(".plan"):
+            os.remove(os.path.join(pdir, stale))
+
+    cmd = (f"sequential-bin/{args.binary} -n -x QUERY_PLACEHOLDER ./{folder}/MODEL_PLACEHOLDER/model.pnml "
+           f"./{folder}/MODEL_PLACEHOLDER/EXAMINATION_PLACEHOLDER.xml -ltl {args.algorithm} {args.arguments}")
+    out = f"{odir}/MODEL_PLACEHOLDER.QUERY_PLACEHOLDER.EXAMINATION_PLACEHOLDER"
+    for minutes, tasks in sorted(plan.items()):
+        path = os.path.join(pdir, f"{minutes}m.plan")
+        with open(path, "w") as file:
+            for task in tasks:
+                print(" ".join(f"{model}:{query}:{t}" for model, query, t in task), file=file)
+        sbatch = ["sbatch", f"--array=1-{len(tasks)}", "-n", "1", "-c", "1", f"--mem={args.memory + 1}G",
+                  f"--partition={args.partition}", f"--time={minutes // 60:02d}:{minutes % 60:02d}:00",
+                  "--output=slurm-dump/job-%j", f"--job-name={args.binary}",
+                  "./run_job_packed.sh", cmd, out, str(args.memory), str(args.timeout), path]
+        print(f"{len(tasks)} tasks of {sum(map(len, tasks))} queries with {minutes} minutes: {path}")
+        if args.dry_run:
+            print(" ".join(f"'{a}'" if " " in a else a for a in sbatch))
+        else:
+            subprocess.run(sbatch, check=True)
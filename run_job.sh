@@ -3,7 +3,7 @@
 TO=15
 ALGORITHM=tarjan
 MEMORY=16
-while getopts ":t:n:hp:a:r:m:" opt; do
+while getopts ":t:n:hp:a:r:m:s:c:" opt; do
     case $opt in
         t)
             TO=$OPTARG
@@ -24,8 +24,16 @@ while getopts ":t:n:hp:a:r:m:" opt; do
 	m)
 	    MEMORY=$OPTARG
 	    ;;
+	s)
+	    # Seconds between resource usage samples, see sample_run.py
+	    export SAMPLE_INTERVAL=$OPTARG
+	    ;;
+	c)
+	    # Earlier result CSVs to pack the SLURM tasks by, see plan_jobs.py
+	    PACK_CSVS=$OPTARG
+	    ;;
         h)
-            echo "$0 [-t timeout] [-n test_name] [-p partition] [-a algorithm] [-h] [-r program arguments] [-m memory] binary test-folder"
+            echo "$0 [-t timeout] [-n test_name] [-p partition] [-a algorithm] [-h] [-r program arguments] [-m memory] [-s sample interval] [-c 'result csvs'] binary test-folder"
             exit 0
             ;;
         :)
@@ -62,6 +70,16 @@ if [[ ! -d "$F" ]] ; then
 fi
 
 
+if [[ -z $PARTITION ]] ; then
+    # Without SLURM, run each query as an individual job on all cores
+    exec ./run_local.py -t $TO -m $MEMORY -a $ALGORITHM -n "$NAME" -r="$ARGUMENTS" ${SAMPLE_INTERVAL:+-s $SAMPLE_INTERVAL} $BIN $F
+fi
+
+if [[ -n $PACK_CSVS ]] ; then
+    # Pack the queries into array tasks by their runtimes in earlier results
+    exec ./plan_jobs.py -t $TO -m $MEMORY -a $ALGORITHM -n "$NAME" -r="$ARGUMENTS" -p $PARTITION -c $PACK_CSVS -- $BIN $F
+fi
+
 ODIR="output/$F/$NAME"
 mkdir -p $ODIR
 COUNT=$(ls $F | wc -l)
@@ -69,9 +87,5 @@ for t in LTL{Cardinality,Fireability} ; do
     let "M=$MEMORY+1" ; 
     CMD="sequential-bin/$BIN -n -x QUERY_PLACEHOLDER ./$F/MODEL_PLACEHOLDER/model.pnml ./$F/MODEL_PLACEHOLDER/${t}.xml -ltl $ALGORITHM $ARGUMENTS" 
     OUT="$ODIR/MODEL_PLACEHOLDER.QUERY_PLACEHOLDER.${t}"
-    if [[ -z $PARTITION ]] ; then
-        parallel ./run_job_array.sh "\"$CMD\"" "\"$OUT\"" $MEMORY $TO $F {} :::: <(seq 1 $COUNT)
-    else
-        sbatch --array=1-$COUNT -n 1 -c $N --mem="${M}G" --partition=$PARTITION --output="slurm-dump/job-%j" --job-name=$BIN ./run_job_array.sh "$CMD" "$OUT" $MEMORY $TO $F
-    fi
+    sbatch --array=1-$COUNT -n 1 -c $N --mem="${M}G" --partition=$PARTITION --output="slurm-dump/job-%j" --job-name=$BIN ./run_job_array.sh "$CMD" "$OUT" $MEMORY $TO $F
 done
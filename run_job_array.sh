@@ -17,6 +17,12 @@ for i in $(seq 1 16) ; do
 
 
     echo "$CMD &> $OUT" 
-    timeout ${4}m /usr/bin/time -f "@@@%e,%M@@@" $CMD &> $OUT
+    if [[ -n $SAMPLE_INTERVAL ]] ; then
+        # Also record a resource usage trace of the run (see sample_run.py)
+        TRACE="$(dirname $OUT)/traces/$(basename $OUT).trace"
+        timeout ${4}m ./sample_run.py -i $SAMPLE_INTERVAL -o $TRACE -- $CMD &> $OUT
+    else
+        timeout ${4}m /usr/bin/time -f "@@@%e,%M@@@" $CMD &> $OUT
+    fi
 done
 exit 0
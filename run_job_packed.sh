@@ -0,0 +1,34 @@
+#!/bin/bash
+#SBATCH --mail-type=FAIL,END
+
+# Runs the jobs of one task of a plan written by plan_jobs.py: line $SLURM_ARRAY_TASK_ID of the
+# plan file lists the jobs as MODEL:QUERY:EXAMINATION, longest first.
+
+if [[ -z $SLURM_ARRAY_TASK_ID ]] ; then
+    SLURM_ARRAY_TASK_ID=$6
+fi
+
+let "m=$3*1024*1024"
+ulimit -v $m
+JOBS=$(sed -n "${SLURM_ARRAY_TASK_ID}p" "$5")
+echo "SLURM_ARRAY_TASK_ID: $SLURM_ARRAY_TASK_ID"
+for JOB in $JOBS ; do
+    IFS=: read MODEL i t <<< "$JOB"
+    CMD=$(echo $1 | sed -e "s/QUERY_PLACEHOLDER/$i/g" | sed -e "s/MODEL_PLACEHOLDER/$MODEL/g" | sed -e "s/EXAMINATION_PLACEHOLDER/$t/g")
+    OUT=$(echo $2 | sed -e "s/QUERY_PLACEHOLDER/$i/g" | sed -e "s/MODEL_PLACEHOLDER/$MODEL/g" | sed -e "s/EXAMINATION_PLACEHOLDER/$t/g")
+
+    # Skip jobs completed before a previous submission of the task ran out of time
+    if [[ -s $OUT ]] ; then
+        continue
+    fi
+
+    echo "$CMD &> $OUT" 
+    if [[ -n $SAMPLE_INTERVAL ]] ; then
+        # Also record a resource usage trace of the run (see sample_run.py)
+        TRACE="$(dirname $OUT)/traces/$(basename $OUT).trace"
+        timeout ${4}m ./sample_run.py -i $SAMPLE_INTERVAL -o $TRACE -- $CMD &> $OUT
+    else
+        timeout ${4}m /usr/bin/time -f "@@@%e,%M@@@" $CMD &> $OUT
+    fi
+done
+exit 0
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+
+"""Run an experiment on the local machine without SLURM.
+
+Takes the same options as run_job.sh, but runs every (model, query, examination) as an individual
+job on a pool of workers, so one slow model does not block its remaining queries. Each job runs
+under the same memory limit (ulimit -v) and timeout as run_job_array.sh, and jobs whose output file
+already exists and is non-empty are skipped.
+"""
+
+import argparse
+import os
+import resource
+import shlex
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+EXAMINATIONS = ["LTLCardinality", "LTLFireability"]
+N_QUERIES = 16
+
+
+def make_jobs(args, folder, odir):
+    models = sorted(os.listdir(folder))
+    for t in EXAMINATIONS:
+        for model in models:
+            for query in range(1, N_QUERIES + 1):
+                cmd = [f"sequential-bin/{args.binary}", "-n", "-x", str(query),
+                       f"./{folder}/{model}/model.pnml", f"./{folder}/{model}/{t}.xml",
+                       "-ltl", args.algorithm, *shlex.split(args.arguments)]
+                yield cmd, os.path.join(odir, f"{model}.{query}.{t}")
+
+
+def run(job, timeout, memory, sample=None):
+    cmd, out = job
+    if os.path.isfile(out) and os.path.getsize(out) > 0:
+        return False
+
+    def limit_memory():
+        # Equivalent of ulimit -v in run_job_array.sh.
+        limit = memory * 1024 * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    if sample is not None:
+        # Also record a resource usage trace of the run, see sample_run.py.
+        trace = os.path.join(os.path.dirname(out), "traces", f"{os.path.basename(out)}.trace")
+        wrapper = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_run.py"), "-i", str(sample), "-o", trace, "--"]
+    else:
+        wrapper = ["/usr/bin/time", "-f", "@@@%e,%M@@@"]
+
+    print(f"{' '.join(cmd)} &> {out}", flush=True)
+    with open(out, "w") as file:
+        subprocess.run(["timeout", f"{timeout}m", *wrapper, *cmd],
+                       stdout=file, stderr=subprocess.STDOUT, preexec_fn=limit_memory)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs an experiment on the local machine. Note that arguments starting with a dash must be given as -r=\"...\".")
+    parser.add_argument("-t", "--timeout", type=int, default=15, help="Timeout per query in minutes. Defaults to 15.")
+    parser.add_argument("-n", "--name", default="", help="Name of the experiment, used as output folder.")
+    parser.add_argument("-a", "--algorithm", default="tarjan", help="LTL algorithm. Defaults to tarjan.")
+    parser.add_argument("-r", "--arguments", default="", help="Additional arguments to the binary.")
+    parser.add_argument("-m", "--memory", type=int, default=16, help="Memory limit per query in GiB. Defaults to 16.")
+    parser.add_argument("-s", "--sample", type=float, help="Also record the memory, CPU time and page faults of each query every this many seconds (see sample_run.py).")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of queries run in parallel. Defaults to the number of CPUs.")
+    parser.add_argument("binary", help="Binary in sequential-bin.")
+    parser.add_argument("folder", help="Folder of models, e.g. mcc2020.")
+
+    args = parser.parse_args()
+
+    folder = os.path.basename(os.path.normpath(args.folder))
+    if not os.path.isfile(f"sequential-bin/{args.binary}"):
+        print(f"{args.binary} is not a file")
+        sys.exit(1)
+    if not os.path.isdir(folder):
+        print(f"{folder} is not a folder")
+        sys.exit(1)
+
+    odir = os.path.join("output", folder, args.name)
+    os.makedirs(odir, exist_ok=True)
+
+    # The workers only wait for the verifier processes, so threads suffice.
+    with ThreadPoolExecutor(args.jobs) as pool:
+        done = list(pool.map(lambda job: run(job, args.timeout, args.memory, args.sample), make_jobs(args, folder, odir)))
+    print(f"Ran {sum(done)} queries, skipped {len(done) - sum(done)} with existing output.")
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+
+"""Run a command while sampling its resource usage.
+
+Replaces `/usr/bin/time -f "@@@%e,%M@@@"` in the job scripts: the command is run with the same
+output, followed by the same `@@@<elapsed>,<max RSS in KiB>@@@` trailer, so to_csv.py is unaffected.
+In addition the RSS, CPU user/system time and page faults of the command are read from
+/proc/<pid>/stat at a fixed interval and written to a binary trace file:
+
+- a header `<8sfIId`: the magic LTLTRAC1, the interval in seconds, clock ticks per second,
+  the page size and the start time (seconds since the epoch),
+- a sample `<fIIIII` per interval: elapsed seconds, RSS in KiB, user and system time in clock
+  ticks, and the number of minor and major page faults,
+- when the command has ended, an end record `<4sifIi4x`: END\\0, the exit status (negative for a
+  signal), the elapsed seconds, the maximum RSS in KiB and the signal that terminated this
+  wrapper (e.g. SIGTERM from timeout; 0 if none).
+
+Only the command itself is sampled, not processes it starts. analysis/memory-growth.py
+summarizes the traces.
+"""
+
+import argparse
+import os
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+MAGIC = b"LTLTRAC1"
+HEADER = struct.Struct("<8sfIId")
+SAMPLE = struct.Struct("<fIIIII")
+END = struct.Struct("<4sifIi4x")
+END_TAG = b"END\0"
+
+
+def read_stat(pid):
+    """The (RSS in pages, utime, stime, minor faults, major faults) of pid, or None if it is gone."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as file:
+            stat = file.read()
+    except OSError:
+        return None
+    # The command name may contain spaces, so the fields are counted from its closing parenthesis.
+    fields = stat[stat.rfind(b")") + 2:].split()
+    return int(fields[21]), int(fields[11]), int(fields[12]), int(fields[7]), int(fields[9])
+
+
+def run(cmd, interval, trace):
+    page_kib = os.sysconf("SC_PAGE_SIZE") // 1024
+    start = time.monotonic()
+    process = subprocess.Popen(cmd)
+    terminated = 0
+
+    def forward(signum, frame):
+        nonlocal terminated
+        terminated = signum
+        process.send_signal(signum)
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, forward)
+
+    # The command is waited for in a thread so its end is noticed immediately instead of at the next sample.
+    done = threading.Event()
+    result = {}
+
+    def wait():
+        _, status, rusage = os.wait4(process.pid, 0)
+        result.update(status=status, rusage=rusage, end=time.monotonic())
+        done.set()
+
+    waiter = threading.Thread(target=wait, daemon=True)
+    waiter.start()
+
+    trace.write(HEADER.pack(MAGIC, interval, os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE"), time.time()))
+    while not done.wait(interval):
+        stat = read_stat(process.pid)
+        if stat is None:
+            continue
+        rss, utime, stime, minflt, majflt = stat
+        trace.write(SAMPLE.pack(time.monotonic() - start, rss * page_kib, utime, stime, minflt, majflt))
+    waiter.join()
+
+    status = result["status"]
+    code = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    elapsed = result["end"] - start
+    maxrss = result["rusage"].ru_maxrss
+    trace.write(END.pack(END_TAG, code, elapsed, maxrss, terminated))
+    return code, elapsed, maxrss, terminated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs a command like /usr/bin/time -f \"@@@%e,%M@@@\" while sampling its memory, CPU time and page faults into a trace file.")
+    parser.add_argument("-i", "--interval", type=float, default=1.0, help="Seconds between samples. Defaults to 1.")
+    parser.add_argument("-o", "--output", required=True, help="The trace file. Its folder is created if needed.")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="The command to run, optionally preceded by --.")
+
+    args = parser.parse_args()
+    cmd = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not cmd:
+        print("Missing command", file=sys.stderr)
+        sys.exit(1)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "wb") as trace:
+        code, elapsed, maxrss, terminated = run(cmd, args.interval, trace)
+
+    if terminated:
+        # Like /usr/bin/time when it is killed by timeout, no trailer is written.
+        sys.exit(128 + terminated)
+    if code < 0:
+        print(f"Command terminated by signal {-code}", file=sys.stderr)
+    elif code > 0:
+        print(f"Command exited with non-zero status {code}", file=sys.stderr)
+    print(f"@@@{elapsed:.2f},{maxrss}@@@", file=sys.stderr)
+    sys.exit(code if code >= 0 else 128 - code)
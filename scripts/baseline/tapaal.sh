@@ -97,17 +97,24 @@ function time_left {
         echo "Out of time, terminating!"
         rm $QF
         rm $MF
+        rm $JOBLOG
         exit
     fi
 }
 
 time_left
 
+# Index of the strategy that provided the answer according to the job log of GNU parallel
+function winning_strategy {
+    awk -F'\t' 'NR > 1 && $7 == 0 { print $1 - 1; exit }' $JOBLOG
+}
+
 function verifyparallel {
     # Keep track of time passed (in seconds)
     mkdir -p $TEMPDIR
     QF=$(mktemp --tmpdir=$TEMPDIR )
     MF=$(mktemp --tmpdir=$TEMPDIR )
+    JOBLOG=$(mktemp --tmpdir=$TEMPDIR )
     echo $TEMPDIR
     echo $QF
     echo $MF
@@ -141,7 +148,7 @@ function verifyparallel {
     MULTIQUERY_INPUT=$(echo ${QUERIES[@]} | sed -e "s/ /,/g")
     time_left
 
-    if [ -z "$MULTIQUERY_INPUT" ]; then echo "All queries are solved" ; time_left; rm $QF; rm $MF; exit; fi
+    if [ -z "$MULTIQUERY_INPUT" ]; then echo "All queries are solved" ; time_left; rm $QF; rm $MF; rm $JOBLOG; exit; fi
 
     # Step 0: Simplification 
     echo "---------------------------------------------------"
@@ -183,6 +190,7 @@ function verifyparallel {
       echo "Model file after phase 0 is empty (CPN unfolding failed), exiting ..."
       rm $QF
       rm $MF
+      rm $JOBLOG
       exit
     fi
  
@@ -197,11 +205,11 @@ function verifyparallel {
     for Q in ${QUERIES[@]}; do
     
         TIMEOUT_PAR=$(( $TIMEOUT_PAR < $SECONDS ? $TIMEOUT_PAR : $SECONDS))
-        if [[ "$TIMEOUT_PAR" -le 0 ]] ; then echo "Out of time, terminating!"; time_left; rm $QF; rm $MF; exit; fi
+        if [[ "$TIMEOUT_PAR" -le 0 ]] ; then echo "Out of time, terminating!"; time_left; rm $QF; rm $MF; rm $JOBLOG; exit; fi
         echo "------------------- QUERY ${Q} ----------------------"
         # Execute verifypn on all parallel strategies
         # All processes are killed if one process provides an answer 
-        step1="$($PAR_CMD --line-buffer --halt now,success=1 --timeout $TIMEOUT_PAR --xapply\
+        step1="$($PAR_CMD --line-buffer --joblog $JOBLOG --halt now,success=1 --timeout $TIMEOUT_PAR --xapply\
             eval $TIME_CMD $VERIFYPN -n $OPTIONS {} $MF $QF --binary-query-io 1 -x $Q -n \
             ::: "${STRATEGIES_PAR[@]}" 2>&1)"
 
@@ -210,6 +218,7 @@ function verifyparallel {
             QUERIES=(${QUERIES[@]:0:$i} ${QUERIES[@]:$(($i + 1))})
             i=$(echo "$i - 1" | bc)
             echo "Solution found by parallel processing (step 1)"
+            echo "Solved by strategy $(winning_strategy) of STRATEGIES_PAR"
         else
             echo "No solution found"
         fi
@@ -227,7 +236,7 @@ function verifyparallel {
     done
 
     # Exit if all queries are answered
-    if [[ ${#QUERIES[@]} == 0 ]]; then echo "All queries are solved" ; time_left; rm $QF; rm $MF; exit; fi
+    if [[ ${#QUERIES[@]} == 0 ]]; then echo "All queries are solved" ; time_left; rm $QF; rm $MF; rm $JOBLOG; exit; fi
     
 
     # Step 2: Sequential
@@ -248,11 +257,11 @@ function verifyparallel {
         TIMEOUT_SEQ=$(echo "$SECONDS / $REMAINING_SEQ" | bc)
         if [[ "$TIMEOUT_SEQ_MIN" -gt "$TIMEOUT_SEQ" ]]; then TIMEOUT_SEQ=$TIMEOUT_SEQ_MIN; fi
         if [[ "$TIMEOUT_SEQ" -gt "$SECONDS" ]]; then TIMEOUT_SEQ=$SECONDS; break; fi
-        if [[ "$TIMEOUT_SEQ" -le 0 ]] ; then echo "Out of time, terminating!"; time_left; rm $QF; rm $MF; exit; fi 
+        if [[ "$TIMEOUT_SEQ" -le 0 ]] ; then echo "Out of time, terminating!"; time_left; rm $QF; rm $MF; rm $JOBLOG; exit; fi 
 
         # Execute verifypn on sequential strategy
         echo "Running query $Q for $TIMEOUT_SEQ seconds. Remaining: $REMAINING_SEQ queries and $SECONDS seconds"
-	step1="$($PAR_CMD --line-buffer --halt now,success=1 --timeout $TIMEOUT_SEQ --xapply\
+	step1="$($PAR_CMD --line-buffer --joblog $JOBLOG --halt now,success=1 --timeout $TIMEOUT_SEQ --xapply\
             eval $TIME_CMD $VERIFYPN -n $OPTIONS {} $MF $QF --binary-query-io 1 -x $Q -n \
             ::: "${STRATEGIES_SEQ[@]}" 2>&1)"
         RETVAL=$?
@@ -262,6 +271,7 @@ function verifyparallel {
             QUERIES=(${QUERIES[@]:0:$i} ${QUERIES[@]:$(($i + 1))})
             i=$(echo "$i - 1" | bc)
             echo "Solution found by sequential processing (step 2)"
+            echo "Solved by strategy $(winning_strategy) of STRATEGIES_SEQ"
 	    echo "$step1"
         else
             echo "No solution found"
@@ -283,7 +293,7 @@ function verifyparallel {
     fi
 
     # Exit if all queries are answered
-    if [[ ${#QUERIES[@]} == 0 ]]; then echo "All queries are solved" ; time_left; rm $QF; rm $MF; exit; fi
+    if [[ ${#QUERIES[@]} == 0 ]]; then echo "All queries are solved" ; time_left; rm $QF; rm $MF; rm $JOBLOG; exit; fi
 
   if $run_multi; then 
     # Step 3: Multiquery
@@ -300,7 +310,7 @@ function verifyparallel {
     
     RED=$(echo "$SECONDS/8" | bc)
     RUN_TIME=$(echo "$SECONDS*6/8" | bc)
-    if [[ "$RUN_TIME" -le 0 ]] ; then echo "Out of time, terminating!"; time_left; rm $QF; rm $MF; exit; fi
+    if [[ "$RUN_TIME" -le 0 ]] ; then echo "Out of time, terminating!"; time_left; rm $QF; rm $MF; rm $JOBLOG; exit; fi
     echo "Running multiquery on -x $MULTIQUERY_INPUT for $RUN_TIME seconds" 
     TMP=$($TIME_CMD $TIMEOUT_CMD $RUN_TIME $VERIFYPN -n $STRATEGY_MULTI $OPTIONS -d $RED -q $RED -p $MF $QF --binary-query-io 1 -n -x $MULTIQUERY_INPUT )
 
@@ -318,7 +328,7 @@ function verifyparallel {
 
     for trial in $(seq 0 20); do
         time_left
-        if [[ ${#QUERIES[@]} == 0 ]]; then echo "All queries are solved" ; time_left; rm $QF; rm $MF; exit; fi
+        if [[ ${#QUERIES[@]} == 0 ]]; then echo "All queries are solved" ; time_left; rm $QF; rm $MF; rm $JOBLOG; exit; fi
         # Step 4: Parallel random search
         echo "---------------------------------------------------"
         echo "            Step 4: Random Parallel processing     "
@@ -333,8 +343,8 @@ function verifyparallel {
             # Execute verifypn on all parallel strategies
             # All processes are killed if one process provides an answer 
             RUN_TIME=$(( $RUN_TIME < $SECONDS ? $RUN_TIME : $SECONDS))
-            if [[ "$RUN_TIME" -le 0 ]] ; then echo "Out of time, terminating!"; time_left; rm $QF; rm $MF; exit; fi
-            step1="$($PAR_CMD --line-buffer --halt now,success=1 --timeout $RUN_TIME --xapply\
+            if [[ "$RUN_TIME" -le 0 ]] ; then echo "Out of time, terminating!"; time_left; rm $QF; rm $MF; rm $JOBLOG; exit; fi
+            step1="$($PAR_CMD --line-buffer --joblog $JOBLOG --halt now,success=1 --timeout $RUN_TIME --xapply\
                 eval $TIME_CMD $VERIFYPN -n $OPTIONS {} $MF $QF --binary-query-io 1 -x $Q -n \
                 ::: "${STRATEGIES_RAND[@]}" 2>&1)"
 
@@ -343,6 +353,7 @@ function verifyparallel {
                 QUERIES=(${QUERIES[@]:0:$i} ${QUERIES[@]:$(($i + 1))})
                 i=$(echo "$i - 1" | bc)
                 echo "Solution found in random processing (step 4)"
+                echo "Solved by strategy $(winning_strategy) of STRATEGIES_RAND"
             else
                 echo "No solution found"
             fi
@@ -365,6 +376,7 @@ function verifyparallel {
     echo "End of script."
     rm $QF
     rm $MF
+    rm $JOBLOG
 }
 
 function LTL {